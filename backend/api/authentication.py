@@ -0,0 +1,71 @@
+"""
+Аутентификация по токену с кэшем в памяти процесса.
+
+Пользователь по токену запоминается на TOKEN_CACHE_TIMEOUT секунд, так
+что аутентифицированный запрос не обращается к базе. У каждого токена
+своя версия: она увеличивается при удалении токена или изменении его
+пользователя, и токен проверяется заново.
+"""
+import copy
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from rest_framework.authentication import TokenAuthentication
+
+from .cache import get_version
+
+
+class LRUCache:
+    """Ограниченный по размеру словарь со сроком жизни записей."""
+
+    def __init__(self, max_size, timeout):
+        self.max_size = max_size
+        self.timeout = timeout
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, key, version):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return None
+            value, expires, entry_version = entry
+            if expires < time.monotonic() or entry_version != version:
+                del self.entries[key]
+                return None
+            self.entries.move_to_end(key)
+            return value
+
+    def set(self, key, value, version):
+        with self.lock:
+            self.entries[key] = (
+                value, time.monotonic() + self.timeout, version
+            )
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_size:
+                self.entries.popitem(last=False)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+
+token_cache = LRUCache(
+    settings.TOKEN_CACHE_SIZE, settings.TOKEN_CACHE_TIMEOUT
+)
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+
+    def authenticate_credentials(self, key):
+        version = get_version(f'token:{key}')
+        cached = token_cache.get(key, version)
+        if cached is None:
+            cached = super().authenticate_credentials(key)
+            token_cache.set(key, cached, version)
+        # Копии, чтобы изменения пользователя в одном запросе
+        # не попали в другие.
+        user, token = cached
+        return copy.copy(user), copy.copy(token)
@@ -0,0 +1,203 @@
+"""
+Кэширование ответов API.
+
+Закэшированные ответы привязаны к версии пространства имён (например,
+«tags»). При изменении данных версия увеличивается, и все ответы,
+построенные на старых данных, перестают использоваться.
+"""
+import hashlib
+import json
+import time
+from http import HTTPStatus
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.cache import (get_conditional_response, patch_cache_control,
+                                patch_vary_headers)
+from django.utils.http import http_date
+from foodgram.db.routers import stick_to_primary
+from rest_framework.response import Response
+
+
+def version_key(namespace):
+    return f'version:{namespace}'
+
+
+def get_version(namespace):
+    """Текущая версия данных пространства имён."""
+    key = version_key(namespace)
+    version = cache.get(key)
+    if version is None:
+        # Начинаем со времени в миллисекундах, чтобы после вытеснения ключа
+        # из кэша новая версия не совпала ни с одной из прежних.
+        cache.add(key, int(time.time() * 1000), None)
+        return cache.get(key)
+    return version
+
+
+# Сколько последних изменений можно восстановить по журналу.
+MAX_CHANGES = 1000
+
+
+def change_key(namespace, version):
+    return f'change:{namespace}:{version}'
+
+
+# Ответы этих пространств имён кэшируются до следующего изменения. Если
+# сразу после изменения прочитать их с отставшей реплики, старые данные
+# останутся в кэше под новой версией, поэтому чтение ненадолго
+# возвращается в основную базу для всех пользователей.
+PRIMARY_AFTER_CHANGE = ('tags', 'ingredients')
+
+
+def bump_version(namespace, changed=None):
+    """
+    Помечает устаревшими все данные, закэшированные в пространстве имён.
+    Если передан id изменённого объекта, он записывается в журнал, по
+    которому индексы в памяти дополняются без полной перестройки.
+    """
+    if namespace in PRIMARY_AFTER_CHANGE:
+        stick_to_primary(f'namespace:{namespace}')
+    try:
+        version = cache.incr(version_key(namespace))
+    except ValueError:
+        get_version(namespace)
+        return
+    if changed is not None:
+        cache.set(
+            change_key(namespace, version), changed,
+            settings.RESPONSE_CACHE_TIMEOUT
+        )
+
+
+def changes_since(namespace, version, current):
+    """
+    Id объектов, изменённых после версии version до current, или None,
+    если журнал неполон и данные нужно перечитать целиком.
+    """
+    if version is None or not 0 <= current - version <= MAX_CHANGES:
+        return None
+    keys = [
+        change_key(namespace, number)
+        for number in range(version + 1, current + 1)
+    ]
+    changes = cache.get_many(keys)
+    if len(changes) != len(keys):
+        return None
+    return set(changes.values())
+
+
+def make_etag(data):
+    content = json.dumps(data, sort_keys=True, default=str).encode()
+    return f'"{hashlib.md5(content).hexdigest()}"'
+
+
+class CachedResponseMixin:
+    """
+    Кэширует ответы list/retrieve вьюсета и поддерживает условные запросы
+    по ETag/If-None-Match. В cache_namespace указывается пространство имён,
+    версия которого меняется при изменении данных.
+    """
+
+    cache_namespace = None
+
+    def list(self, request, *args, **kwargs):
+        return self.cached_response(super().list, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.cached_response(
+            super().retrieve, request, *args, **kwargs
+        )
+
+    def cached_response(self, handler, request, *args, **kwargs):
+        version = get_version(self.cache_namespace)
+        key = f'response:{self.cache_namespace}:{version}:' + hashlib.md5(
+            request.get_full_path().encode()
+        ).hexdigest()
+        cached = cache.get(key)
+        if cached is None:
+            response = handler(request, *args, **kwargs)
+            if response.status_code != HTTPStatus.OK:
+                return response
+            cached = (make_etag(response.data), response.data)
+            cache.set(key, cached, settings.RESPONSE_CACHE_TIMEOUT)
+        etag, data = cached
+        if etag in request.headers.get('If-None-Match', ''):
+            return Response(
+                status=HTTPStatus.NOT_MODIFIED, headers={'ETag': etag}
+            )
+        return Response(data, headers={'ETag': etag})
+
+
+class ConditionalResponseMixin:
+    """
+    Условные запросы к list/retrieve вьюсета. Валидаторы ответа (ETag и
+    время изменения) считаются до сериализации: для списка — по уже
+    прочитанным строкам страницы методом get_list_validators, для объекта —
+    методом get_object_validators. Если у клиента та же версия, сразу
+    отдаётся 304. Ответы анонимным пользователям публичные, их может
+    кэшировать nginx, остальные — только в браузере с проверкой.
+    """
+
+    def get_list_validators(self, rows):
+        """(etag, last_modified) для строк страницы или None."""
+
+    def get_object_validators(self):
+        """(etag, last_modified) или None, если проверка невозможна."""
+
+    def get_list_queryset(self):
+        """Запрос для страницы списка, до загрузки связанных данных."""
+        return self.get_queryset()
+
+    def prepare_rows(self, rows):
+        """Догружает связанные данные строк страницы перед сериализацией."""
+
+    def list(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_list_queryset())
+        page = self.paginate_queryset(queryset)
+        rows = list(queryset) if page is None else page
+        validators = self.get_list_validators(rows)
+        response = self.not_modified_response(request, validators)
+        if response is None:
+            self.prepare_rows(rows)
+            data = self.get_serializer(rows, many=True).data
+            if page is None:
+                response = Response(data)
+            else:
+                response = self.get_paginated_response(data)
+        return self.with_validators(request, response, validators)
+
+    def retrieve(self, request, *args, **kwargs):
+        validators = self.get_object_validators()
+        response = self.not_modified_response(request, validators)
+        if response is None:
+            response = super().retrieve(request, *args, **kwargs)
+            if response.status_code != HTTPStatus.OK:
+                return response
+        return self.with_validators(request, response, validators)
+
+    def not_modified_response(self, request, validators):
+        etag, last_modified = validators or (None, None)
+        if etag is None:
+            return None
+        return get_conditional_response(
+            request, etag=etag,
+            last_modified=last_modified and int(last_modified.timestamp())
+        )
+
+    def with_validators(self, request, response, validators):
+        etag, last_modified = validators or (None, None)
+        if etag is not None:
+            response['ETag'] = etag
+        if last_modified:
+            response['Last-Modified'] = http_date(
+                int(last_modified.timestamp())
+            )
+        if request.user.is_authenticated:
+            patch_cache_control(response, private=True, no_cache=True)
+        else:
+            patch_cache_control(
+                response, public=True, max_age=settings.PUBLIC_CACHE_MAX_AGE
+            )
+        patch_vary_headers(response, ('Accept', 'Authorization'))
+        return response
@@ -0,0 +1,274 @@
+"""
+Выгрузка списка покупок в разных форматах.
+
+Формат выбирается параметром ?format= или заголовком Accept. Файл
+отдаётся по частям и кэшируется до изменения корзины или плана питания
+пользователя, рецептов или ингредиентов. Под ASGI файл собирается
+целиком в потоке запроса, см. read_whole.
+"""
+import csv
+import hashlib
+import json
+from collections import namedtuple
+from functools import lru_cache
+from io import BytesIO
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, Max
+from django.http import HttpResponse, StreamingHttpResponse
+from recipys.models import Basket, MealPlanEntry
+from reportlab.lib.pagesizes import A4
+from reportlab.pdfbase import pdfmetrics
+from reportlab.pdfbase.ttfonts import TTFont
+from reportlab.pdfgen.canvas import Canvas
+
+from .cache import get_version
+from .services import get_meal_plan_list, get_shopping_list
+
+Exporter = namedtuple('Exporter', 'render media_type extension')
+
+EXPORTERS = {}
+
+# Размер части, которой отдаётся PDF.
+PDF_CHUNK_SIZE = 64 * 1024
+
+
+def exporter(file_format, media_type, extension=None):
+    """Регистрирует функцию, отдающую список покупок по частям."""
+    def decorator(func):
+        EXPORTERS[file_format] = Exporter(
+            func, media_type, extension or file_format
+        )
+        return func
+    return decorator
+
+
+def item_fields(item):
+    return (
+        item['ingredient__name'],
+        item['amount'],
+        item['unit'],
+    )
+
+
+@exporter('txt', 'text/plain')
+def render_txt(ingredients, empty_message):
+    yield 'Список покупок:\n\n'
+    if not ingredients:
+        yield empty_message
+    for name, amount, unit in map(item_fields, ingredients):
+        yield f'{name}: {amount} {unit}\n'
+
+
+class Echo:
+    """Файл для csv.writer, который возвращает записанную строку."""
+
+    def write(self, value):
+        return value
+
+
+@exporter('csv', 'text/csv')
+def render_csv(ingredients, empty_message):
+    writer = csv.writer(Echo())
+    yield writer.writerow(('ингредиент', 'количество', 'единицы измерения'))
+    for item in ingredients:
+        yield writer.writerow(item_fields(item))
+
+
+@exporter('json', 'application/json')
+def render_json(ingredients, empty_message):
+    yield '['
+    for number, (name, amount, unit) in enumerate(
+        map(item_fields, ingredients)
+    ):
+        if number:
+            yield ','
+        yield json.dumps(
+            {'name': name, 'amount': amount, 'measurement_unit': unit},
+            ensure_ascii=False
+        )
+    yield ']'
+
+
+@lru_cache(maxsize=None)
+def pdf_font():
+    # Встроенные шрифты PDF не содержат кириллицы.
+    pdfmetrics.registerFont(TTFont('ShoppingList', settings.PDF_FONT_PATH))
+    return 'ShoppingList'
+
+
+@exporter('pdf', 'application/pdf')
+def render_pdf(ingredients, empty_message):
+    """
+    PDF собирается в памяти целиком: reportlab записывает таблицу
+    ссылок в конец файла. Отдаётся он так же по частям.
+    """
+    buffer = BytesIO()
+    canvas = Canvas(buffer, pagesize=A4)
+    height = A4[1]
+    margin = 50
+    lines = ['Список покупок:', ''] + [
+        f'{name}: {amount} {unit}'
+        for name, amount, unit in map(item_fields, ingredients)
+    ]
+    if not ingredients:
+        lines.append(empty_message)
+    y = height - margin
+    for line in lines:
+        if y < margin:
+            canvas.showPage()
+            y = height - margin
+        canvas.setFont(pdf_font(), 12)
+        canvas.drawString(margin, y, line)
+        y -= 18
+    canvas.save()
+    content = buffer.getbuffer()
+    for start in range(0, len(content), PDF_CHUNK_SIZE):
+        yield bytes(content[start:start + PDF_CHUNK_SIZE])
+
+
+def accepted_media_types(header):
+    """Типы из заголовка Accept в порядке предпочтения."""
+    accepted = []
+    for position, value in enumerate(header.split(',')):
+        media_type, *params = [part.strip() for part in value.split(';')]
+        quality = 1.0
+        for param in params:
+            if param.startswith('q='):
+                try:
+                    quality = float(param[2:])
+                except ValueError:
+                    quality = 0.0
+        if quality > 0:
+            accepted.append((-quality, position, media_type.lower()))
+    return [media_type for _, _, media_type in sorted(accepted)]
+
+
+def choose_exporter(request):
+    """
+    Формат из параметра ?format=, иначе первый подходящий по Accept.
+    Без них список отдаётся текстом. None, если формат не поддерживается.
+    """
+    file_format = request.GET.get('format')
+    if file_format:
+        return EXPORTERS.get(file_format)
+    header = request.META.get('HTTP_ACCEPT', '*/*')
+    for media_type in accepted_media_types(header):
+        for export in EXPORTERS.values():
+            if media_type in ('*/*', export.media_type) or (
+                media_type.endswith('/*')
+                and export.media_type.startswith(media_type[:-1])
+            ):
+                return export
+    return None
+
+
+def cache_chunks(key, chunks):
+    """Отдаёт части файла и после последней кладёт весь файл в кэш."""
+    content = []
+    for chunk in chunks:
+        if isinstance(chunk, str):
+            chunk = chunk.encode('utf-8')
+        content.append(chunk)
+        yield chunk
+    cache.set(key, b''.join(content), settings.RESPONSE_CACHE_TIMEOUT)
+
+
+def read_whole(response):
+    """
+    Обычный ответ с содержимым потокового. Django 3.2 под ASGI перебирает
+    части потокового ответа прямо в цикле событий, и отрисовка PDF и
+    запись в кэш задерживали бы остальные запросы воркера, поэтому файл
+    собирается заранее, в потоке представления.
+    """
+    whole = HttpResponse(
+        b''.join(response.streaming_content), status=response.status_code
+    )
+    for header, value in response.items():
+        whole[header] = value
+    return whole
+
+
+def export_response(export, key, filename, get_ingredients, empty_message):
+    """
+    Ответ с файлом списка покупок из кэша по ключу key. Если файла в
+    кэше нет, ингредиенты берутся из get_ingredients().
+    """
+    content_type = export.media_type
+    if content_type.startswith('text/') or content_type.endswith('/json'):
+        content_type += '; charset=utf-8'
+    content = cache.get(key)
+    if content is None:
+        ingredients = list(get_ingredients())
+        response = StreamingHttpResponse(
+            cache_chunks(key, export.render(ingredients, empty_message)),
+            content_type=content_type
+        )
+    else:
+        response = HttpResponse(content, content_type=content_type)
+    response['Content-Disposition'] = (
+        f'attachment; filename="{filename}.{export.extension}"'
+    )
+    return response
+
+
+def state_hash(state):
+    return hashlib.md5(str(sorted(state.items())).encode()).hexdigest()
+
+
+def shopping_list_response(export, user):
+    """
+    Ответ с файлом списка покупок по корзине пользователя. Кроме версий
+    в ключ входят число рецептов в корзине и время последнего добавления
+    и изменения рецепта: если воркер пропустил увеличение версии, старый
+    файл всё равно не будет отдан.
+    """
+    state = Basket.objects.filter(user=user).aggregate(
+        count=Count('id'),
+        added_at=Max('added_at'),
+        updated_at=Max('recipy__updated_at'),
+    )
+    key = 'shopping_list:{}:{}:{}:{}:{}:{}'.format(
+        user.id,
+        export.extension,
+        state_hash(state),
+        get_version(f'basket:{user.id}'),
+        get_version('recipes'),
+        get_version('ingredients'),
+    )
+    return export_response(
+        export, key, 'grocery_list',
+        lambda: get_shopping_list(user),
+        'Корзина пуста!'
+    )
+
+
+def meal_plan_response(export, user, start, end):
+    """
+    Ответ с файлом списка покупок по плану питания на период. Как и для
+    корзины, в ключ входит состояние плана в базе: число блюд за период и
+    время последнего изменения блюда и рецепта.
+    """
+    state = MealPlanEntry.objects.filter(
+        user=user, date__range=(start, end)
+    ).aggregate(
+        count=Count('id'),
+        updated_at=Max('updated_at'),
+        recipy_updated_at=Max('recipy__updated_at'),
+    )
+    key = 'meal_plan_list:{}:{}:{}:{}:{}:{}:{}:{}'.format(
+        user.id,
+        export.extension,
+        start.isoformat(),
+        end.isoformat(),
+        state_hash(state),
+        get_version(f'meal_plan:{user.id}'),
+        get_version('recipes'),
+        get_version('ingredients'),
+    )
+    return export_response(
+        export, key, f'grocery_list_{start}_{end}',
+        lambda: get_meal_plan_list(user, start, end),
+        'На эти дни ничего не запланировано!'
+    )
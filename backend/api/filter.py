@@ -1,30 +1,111 @@
+from django.conf import settings
+from django.contrib.postgres.search import SearchQuery, SearchRank
+from django.core.cache import cache
+from django.db import connection
+from django.db.models import CharField, Exists, F, OuterRef, Value
+from django.db.models.functions import Cast, Concat, StrIndex
 from django_filters import rest_framework as filters
-from recipys.models import Ingredient, Recipy
+from django_filters.widgets import QueryArrayWidget
+from recipys.models import Ingredient, Recipy, Tag
+
+from .cache import get_version
+from .search import ingredient_index, recipy_index
+
+
+def order_by_ids(queryset, ids):
+    """
+    Объекты с указанными id в порядке списка. Порядок задаётся позицией
+    id в строке, а не CASE с веткой на каждый id: такой запрос гораздо
+    быстрее собирается для длинных списков.
+    """
+    positions = ',{},'.format(','.join(map(str, ids)))
+    return queryset.filter(pk__in=ids).order_by(StrIndex(
+        Value(positions),
+        Concat(Value(','), Cast('pk', CharField()), Value(','))
+    ))
 
 
 class IngredientFilter(filters.FilterSet):
-    name = filters.CharFilter(lookup_expr='istartswith')
+    name = filters.CharFilter(method='filter_name')
 
     class Meta:
         model = Ingredient
         fields = ('name',)
 
+    def filter_name(self, queryset, name, value):
+        return order_by_ids(queryset, ingredient_index.search(
+            value, settings.INGREDIENT_SEARCH_LIMIT
+        ))
+
+
+def get_tag_ids(slugs):
+    """Id тегов по слагам. Соответствие слагов и id хранится в кэше."""
+    tag_ids = cache.get_or_set(
+        f'tag_ids:{get_version("tags")}',
+        lambda: dict(Tag.objects.values_list('slug', 'id')),
+        settings.RESPONSE_CACHE_TIMEOUT
+    )
+    return [tag_ids[slug] for slug in slugs if slug in tag_ids]
+
+
+class StableOrderingFilter(filters.OrderingFilter):
+    """Добавляет id к сортировке, чтобы порядок страниц не менялся."""
+
+    def filter(self, qs, value):
+        qs = super().filter(qs, value)
+        if value:
+            return qs.order_by(*qs.query.order_by, '-id')
+        return qs
+
 
 class RecipyFilter(filters.FilterSet):
-    tags = filters.AllValuesMultipleFilter(field_name='tags__slug')
+    tags = filters.Filter(method='filter_tags', widget=QueryArrayWidget)
     is_favorited = filters.BooleanFilter(method='filter_is_favorited')
     is_in_shopping_cart = filters.BooleanFilter(method='filter_is_in_cart')
+    search = filters.CharFilter(method='filter_search')
+    ordering = StableOrderingFilter(fields=(
+        ('pub_date', 'pub_date'),
+        ('favorites_count', 'favorites'),
+        ('in_baskets_count', 'baskets'),
+    ))
 
     class Meta:
         model = Recipy
-        fields = ['author', 'tags', 'is_favorited', 'is_in_shopping_cart']
+        fields = ['author', 'tags', 'is_favorited', 'is_in_shopping_cart',
+                  'search']
+
+    def filter_tags(self, queryset, name, value):
+        # EXISTS вместо JOIN: рецепт с несколькими тегами попадает
+        # в выборку один раз.
+        return queryset.filter(Exists(
+            Recipy.tags.through.objects.filter(
+                recipy_id=OuterRef('pk'),
+                tag_id__in=get_tag_ids(value)
+            )
+        ))
+
+    def filter_search(self, queryset, name, value):
+        # Сортировка по релевантности; параметр ordering её заменяет.
+        if connection.vendor == 'postgresql':
+            query = SearchQuery(
+                value, config='russian', search_type='websearch'
+            )
+            return (
+                queryset
+                .filter(search_vector=query)
+                .annotate(rank=SearchRank(F('search_vector'), query))
+                .order_by('-rank', '-id')
+            )
+        return order_by_ids(queryset, recipy_index.search(
+            value, settings.RECIPE_SEARCH_LIMIT
+        ))
 
     def filter_is_favorited(self, queryset, name, value):
         if value:
-            return queryset.filter(favorite__user=self.request.user)
+            return queryset.filter(is_favorited=True)
         return queryset
 
     def filter_is_in_cart(self, queryset, name, value):
         if value:
-            return queryset.filter(recipy_in_basket__user=self.request.user)
+            return queryset.filter(is_in_shopping_cart=True)
         return queryset
@@ -0,0 +1,128 @@
+"""
+Обработка загруженных изображений рецептов вне потока запроса.
+
+После сохранения рецепта оригинал перекодируется без метаданных, а для
+списков готовятся уменьшенные копии. Работа выполняется в пуле потоков
+после фиксации транзакции.
+"""
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.db import connection, transaction
+from django.utils import timezone
+from PIL import Image, ImageOps, features
+from recipys.models import Recipy
+
+from .cache import bump_version
+
+logger = logging.getLogger(__name__)
+
+# Поле модели и наибольшая сторона уменьшенной копии в пикселях.
+RENDITIONS = {
+    'image_thumbnail': 320,
+    'image_medium': 800,
+}
+
+
+@lru_cache(maxsize=None)
+def get_executor():
+    return ThreadPoolExecutor(
+        max_workers=settings.IMAGE_PIPELINE_WORKERS,
+        thread_name_prefix='recipy-images'
+    )
+
+
+def schedule_renditions(recipy):
+    """
+    Ставит изображение рецепта в очередь на обработку. Старые копии
+    сбрасываются, пока не готовы новые, отдаётся оригинал.
+    """
+    if any(getattr(recipy, field) for field in RENDITIONS):
+        Recipy.objects.filter(pk=recipy.pk).update(
+            **{field: '' for field in RENDITIONS}
+        )
+        for field in RENDITIONS:
+            setattr(recipy, field, '')
+    if settings.IMAGE_PIPELINE_SYNC:
+        transaction.on_commit(
+            lambda: process_image(recipy.pk, recipy.image.name)
+        )
+    else:
+        transaction.on_commit(lambda: get_executor().submit(
+            process_image_in_thread, recipy.pk, recipy.image.name
+        ))
+
+
+def process_image_in_thread(recipy_id, image_name):
+    try:
+        process_image(recipy_id, image_name)
+    except Exception:
+        logger.exception('Не удалось обработать изображение %s', image_name)
+    finally:
+        # У каждого потока своё соединение с базой, не оставляем его.
+        connection.close()
+
+
+def encode(image, image_format):
+    buffer = BytesIO()
+    if image_format == 'JPEG':
+        image = image.convert('RGB')
+        image.save(buffer, 'JPEG', quality=85, optimize=True)
+    else:
+        image.save(buffer, image_format, quality=80)
+    return buffer.getvalue()
+
+
+def process_image(recipy_id, image_name):
+    """Перекодирует оригинал без метаданных и сохраняет уменьшенные копии."""
+    recipy = Recipy.objects.filter(pk=recipy_id, image=image_name).first()
+    if recipy is None:
+        # Рецепт удалён или изображение уже заменено.
+        return
+    with recipy.image.open('rb') as file:
+        image = Image.open(file)
+        original_format = image.format
+        image = ImageOps.exif_transpose(image)
+        image.load()
+    if image.mode not in ('RGB', 'RGBA'):
+        image = image.convert('RGBA' if 'transparency' in image.info
+                              else 'RGB')
+
+    # Оригинал без EXIF и прочих метаданных сохраняется рядом со старым:
+    # пока рецепт не переключён на новый файл, старый должен оставаться
+    # на месте. Хранилище само выбирает свободное имя.
+    storage = recipy.image.storage
+    cleaned_name = storage.save(
+        image_name, ContentFile(encode(image, original_format))
+    )
+    saved = [cleaned_name]
+
+    image_format = 'WEBP' if features.check('webp') else 'JPEG'
+    base_name = os.path.splitext(os.path.basename(image_name))[0]
+    renditions = {}
+    for field, size in RENDITIONS.items():
+        rendition = image.copy()
+        rendition.thumbnail((size, size), Image.LANCZOS)
+        file_field = getattr(recipy, field)
+        file_field.save(
+            f'{base_name}.{image_format.lower()}',
+            ContentFile(encode(rendition, image_format)),
+            save=False
+        )
+        renditions[field] = file_field.name
+        saved.append(file_field.name)
+    updated = Recipy.objects.filter(pk=recipy_id, image=image_name).update(
+        image=cleaned_name, updated_at=timezone.now(), **renditions
+    )
+    # Удаляем файлы, на которые рецепт больше не ссылается: старый
+    # оригинал или, если изображение успели заменить, новые файлы.
+    for name in ([image_name] if updated else saved):
+        storage.delete(name)
+    if updated:
+        # Ссылки на файлы попадают в ответы API, кэш по ним устарел.
+        bump_version('recipes', recipy_id)
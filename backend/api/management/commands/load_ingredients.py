@@ -0,0 +1,101 @@
+import csv
+import json
+import time
+from itertools import islice
+
+from api.cache import bump_version
+from django.core.management.base import BaseCommand, CommandError
+from recipys.models import Ingredient
+
+CHUNK_SIZE = 64 * 1024
+
+
+def read_csv(file):
+    for row in csv.reader(file):
+        if len(row) >= 2:
+            yield row[0], row[1]
+
+
+def read_json(file):
+    """
+    Читает JSON-массив объектов по частям, не загружая файл целиком.
+    Поддерживается и формат «один объект на строку».
+    """
+    decoder = json.JSONDecoder()
+    buffer = ''
+    position = 0
+    while True:
+        chunk = file.read(CHUNK_SIZE)
+        buffer = buffer[position:] + chunk
+        position = 0
+        while True:
+            while position < len(buffer) and buffer[position] in '[], \r\n\t':
+                position += 1
+            if position == len(buffer):
+                break
+            try:
+                item, position_end = decoder.raw_decode(buffer, position)
+            except json.JSONDecodeError:
+                if not chunk:
+                    raise
+                # Объект разрезан границей блока, дочитываем файл.
+                break
+            position = position_end
+            yield item['name'], item['measurement_unit']
+        if not chunk:
+            return
+
+
+READERS = {
+    'csv': read_csv,
+    'json': read_json,
+    'jsonl': read_json,
+}
+
+
+class Command(BaseCommand):
+    help = 'Загружает ингредиенты из CSV или JSON без создания дублей.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='Файл ingredients.csv или .json')
+        parser.add_argument(
+            '--format', choices=READERS,
+            help='Формат файла. По умолчанию определяется по расширению.'
+        )
+        parser.add_argument('--batch-size', type=int, default=5000)
+
+    def handle(self, *args, **options):
+        path = options['path']
+        file_format = options['format'] or path.rsplit('.', 1)[-1].lower()
+        if file_format not in READERS:
+            raise CommandError(f'Неизвестный формат файла: {path}')
+        batch_size = options['batch_size']
+
+        started = time.perf_counter()
+        total_before = Ingredient.objects.count()
+        processed = 0
+        with open(path, encoding='utf-8', newline='') as file:
+            rows = READERS[file_format](file)
+            while True:
+                chunk = list(islice(rows, batch_size))
+                if not chunk:
+                    break
+                processed += len(chunk)
+                batch = {
+                    (name.strip(), measurement_unit.strip())
+                    for name, measurement_unit in chunk
+                }
+                Ingredient.objects.bulk_create(
+                    (Ingredient(name=name, measurement_unit=measurement_unit)
+                     for name, measurement_unit in batch),
+                    ignore_conflicts=True
+                )
+        # bulk_create не отправляет сигналы, сбрасываем кэш вручную.
+        bump_version('ingredients')
+
+        elapsed = time.perf_counter() - started
+        created = Ingredient.objects.count() - total_before
+        self.stdout.write(self.style.SUCCESS(
+            f'Обработано строк: {processed}, добавлено: {created}, '
+            f'{processed / elapsed:.0f} строк/с.'
+        ))
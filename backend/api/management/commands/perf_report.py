@@ -0,0 +1,62 @@
+import json
+import os
+from collections import Counter, defaultdict
+
+from api.profiling import percentile
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+
+class Command(BaseCommand):
+    help = 'Отчёт о времени ответа и запросах к базе по маршрутам API.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--log', default=settings.QUERY_PROFILER_LOG)
+        parser.add_argument(
+            '--sort', default='p95',
+            choices=('p50', 'p95', 'p99', 'queries', 'count')
+        )
+        parser.add_argument(
+            '--duplicates', type=int, default=3,
+            help='Сколько повторяющихся SQL-запросов показывать на маршрут.'
+        )
+
+    def handle(self, *args, **options):
+        if not os.path.exists(options['log']):
+            raise CommandError(f'Журнал {options["log"]} не найден.')
+        routes = defaultdict(list)
+        with open(options['log'], encoding='utf-8') as log:
+            for line in log:
+                record = json.loads(line)
+                routes[record['method'], record['route']].append(record)
+
+        rows = []
+        for (method, route), records in routes.items():
+            count = len(records)
+            timings = [record['total_ms'] for record in records]
+            duplicates = Counter()
+            for record in records:
+                duplicates.update(record['duplicates'])
+            rows.append({
+                'route': f'{method} {route}',
+                'count': count,
+                'p50': percentile(timings, 50),
+                'p95': percentile(timings, 95),
+                'p99': percentile(timings, 99),
+                'queries': sum(
+                    record['queries'] for record in records) / count,
+                'db': sum(record['db_ms'] for record in records) / count,
+                'duplicates': duplicates.most_common(options['duplicates']),
+            })
+        rows.sort(key=lambda row: row[options['sort']], reverse=True)
+
+        for row in rows:
+            self.stdout.write(self.style.MIGRATE_HEADING(row['route']))
+            self.stdout.write(
+                '  запросов к API: {count}, p50={p50:.1f}ms '
+                'p95={p95:.1f}ms p99={p99:.1f}ms, '
+                'SQL-запросов в среднем: {queries:.1f}, '
+                'время в базе: {db:.1f}ms'.format(**row)
+            )
+            for sql, count in row['duplicates']:
+                self.stdout.write(f'  повторов {count}: {sql[:200]}')
@@ -0,0 +1,87 @@
+"""
+Подбор рецептов по ингредиентам, которые есть у пользователя.
+
+Каждый процесс держит в памяти наборы ингредиентов рецептов и обратный
+индекс «ингредиент → рецепты». После изменения рецептов индекс
+дополняется по журналу изменений версии «recipes» (см. api.cache),
+а если журнал неполон, перестраивается целиком.
+"""
+import heapq
+import threading
+from collections import Counter, defaultdict
+
+from recipys.models import IngredientsForRecipy
+
+from .cache import changes_since, get_version
+
+
+class RecipyMatcher:
+
+    def __init__(self):
+        self.version = None
+        self.ingredients = {}
+        self.recipes = defaultdict(set)
+        self.lock = threading.Lock()
+
+    def build(self, rows):
+        """Строит индекс по парам (id рецепта, id ингредиента)."""
+        ingredients = defaultdict(set)
+        recipes = defaultdict(set)
+        for recipy_id, ingredient_id in rows:
+            ingredients[recipy_id].add(ingredient_id)
+            recipes[ingredient_id].add(recipy_id)
+        self.ingredients, self.recipes = dict(ingredients), recipes
+
+    def update(self, recipy_ids):
+        """Перечитывает ингредиенты указанных рецептов."""
+        fresh = defaultdict(set)
+        rows = IngredientsForRecipy.objects.filter(
+            recipy_id__in=recipy_ids
+        ).values_list('recipy_id', 'ingredient_id')
+        for recipy_id, ingredient_id in rows:
+            fresh[recipy_id].add(ingredient_id)
+        for recipy_id in recipy_ids:
+            for ingredient_id in self.ingredients.pop(recipy_id, ()):
+                self.recipes[ingredient_id].discard(recipy_id)
+            # Рецепт без ингредиентов удалён.
+            for ingredient_id in fresh.get(recipy_id, ()):
+                self.recipes[ingredient_id].add(recipy_id)
+            if recipy_id in fresh:
+                self.ingredients[recipy_id] = fresh[recipy_id]
+
+    def refresh(self):
+        version = get_version('recipes')
+        if version == self.version:
+            return
+        changed = changes_since('recipes', self.version, version)
+        if changed is None:
+            self.build(IngredientsForRecipy.objects.values_list(
+                'recipy_id', 'ingredient_id'
+            ).iterator())
+        else:
+            self.update(changed)
+        self.version = version
+
+    def match(self, ingredient_ids, limit):
+        """
+        Рецепты, в которых есть хотя бы один из ингредиентов, по
+        возрастанию числа недостающих. Возвращает тройки
+        (id рецепта, есть ингредиентов, не хватает ингредиентов).
+        """
+        with self.lock:
+            self.refresh()
+            matched = Counter()
+            for ingredient_id in set(ingredient_ids):
+                matched.update(self.recipes.get(ingredient_id, ()))
+            ingredients = self.ingredients
+            best = heapq.nsmallest(limit, (
+                (len(ingredients[recipy_id]) - count, -count, -recipy_id)
+                for recipy_id, count in matched.items()
+            ))
+        return [
+            (-recipy_id, -count, missing)
+            for missing, count, recipy_id in best
+        ]
+
+
+recipy_matcher = RecipyMatcher()
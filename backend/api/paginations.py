@@ -1,5 +1,21 @@
-from rest_framework.pagination import PageNumberPagination
+from rest_framework.pagination import CursorPagination, PageNumberPagination
 
 
 class LimitNumberPagePagination(PageNumberPagination):
     page_size_query_param = 'limit'
+
+
+class RecipyCursorPagination(CursorPagination):
+    """
+    Постраничный вывод рецептов по курсору: без OFFSET и COUNT(*), поэтому
+    дальние страницы отдаются так же быстро, как первые.
+    """
+
+    ordering = ('-pub_date', '-id')
+    page_size_query_param = 'limit'
+
+
+class TrendingCursorPagination(RecipyCursorPagination):
+    """Рейтинг популярных рецептов по курсору, по убыванию очков."""
+
+    ordering = ('-trending_score', '-id')
@@ -5,6 +5,9 @@ class AdminPermission(permissions.BasePermission):
     def has_permission(self, request, view):
         return (request.user.is_authenticated and request.user.is_superuser)
 
+    def has_object_permission(self, request, view, obj):
+        return request.user.is_superuser
+
 
 class AuthorOrReadOnly(permissions.BasePermission):
     def has_permission(self, request, view):
@@ -12,5 +15,6 @@ class AuthorOrReadOnly(permissions.BasePermission):
                 or request.user.is_authenticated)
 
     def has_object_permission(self, request, view, obj):
-        return (obj.author == request.user
+        return (request.method in permissions.SAFE_METHODS
+                or obj.author == request.user
                 or request.user.is_superuser)
@@ -0,0 +1,161 @@
+"""
+Профилирование запросов к API.
+
+QueryProfilerMiddleware считает для выборки запросов число обращений
+к базе, время в базе и повторяющиеся SQL-запросы, добавляет их в
+заголовки Server-Timing и X-Query-Count и пишет в журнал, из которого
+`manage.py perf_report` строит отчёт по маршрутам.
+"""
+import atexit
+import json
+import random
+import re
+import threading
+import time
+from collections import Counter
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+
+# Значения, которые меняются от запроса к запросу, заменяются
+# заглушками, чтобы одинаковые по смыслу запросы совпадали.
+LITERALS = re.compile(r"'(?:[^']|'')*'|\b\d+\b")
+PLACEHOLDER_LISTS = re.compile(r'\((?:\s*\?\s*,)+\s*\?\s*\)')
+
+
+def percentile(values, percent):
+    """Перцентиль по методу ближайшего ранга."""
+    ordered = sorted(values)
+    index = max(0, int(round(percent / 100 * len(ordered))) - 1)
+    return ordered[index]
+
+
+def fingerprint(sql):
+    sql = LITERALS.sub('?', sql.replace('%s', '?'))
+    return PLACEHOLDER_LISTS.sub('(...)', sql)
+
+
+class QueryRecorder:
+    """Обёртка для execute_wrapper, запоминающая запросы и их время."""
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+        self.fingerprints = Counter()
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.duration += time.perf_counter() - started
+            self.count += 1
+            self.fingerprints[fingerprint(sql)] += 1
+
+    def duplicates(self):
+        return {
+            sql: count for sql, count in self.fingerprints.items()
+            if count > 1
+        }
+
+
+class ProfileLog:
+    """Буфер замеров, который периодически дописывается в файл журнала."""
+
+    def __init__(self):
+        self.records = []
+        self.lock = threading.Lock()
+        atexit.register(self.flush)
+
+    def add(self, record):
+        with self.lock:
+            self.records.append(record)
+            if len(self.records) < settings.QUERY_PROFILER_FLUSH_EVERY:
+                return
+            records, self.records = self.records, []
+        self.write(records)
+
+    def flush(self):
+        with self.lock:
+            records, self.records = self.records, []
+        self.write(records)
+
+    def write(self, records):
+        if not records:
+            return
+        with open(settings.QUERY_PROFILER_LOG, 'a', encoding='utf-8') as log:
+            log.writelines(
+                json.dumps(record, ensure_ascii=False) + '\n'
+                for record in records
+            )
+
+
+profile_log = ProfileLog()
+
+
+class QueryProfilerMiddleware:
+    def __init__(self, get_response):
+        if not settings.QUERY_PROFILER_ENABLED:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if random.random() >= settings.QUERY_PROFILER_SAMPLE_RATE:
+            return self.get_response(request)
+
+        recorder = QueryRecorder()
+        started = time.perf_counter()
+        request.profile = {'recorder': recorder, 'started': started}
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(recorder))
+            response = self.get_response(request)
+        total = time.perf_counter() - started
+
+        # DRF сериализует данные внутри представления, поэтому время
+        # сериализации входит в app: время представления без базы.
+        timings = request.profile
+        view = timings.get('view', total)
+        render = timings.get('render', 0.0)
+        metrics = {
+            'total_ms': total * 1000,
+            'db_ms': recorder.duration * 1000,
+            'app_ms': max(view - timings.get('view_db', 0.0), 0.0) * 1000,
+            'render_ms': render * 1000,
+        }
+        if settings.QUERY_PROFILER_HEADERS:
+            response['X-Query-Count'] = recorder.count
+            response['Server-Timing'] = ', '.join(
+                f'{name[:-3]};dur={value:.2f}'
+                for name, value in metrics.items()
+            )
+
+        match = request.resolver_match
+        route = match.route if match else request.path
+        profile_log.add({
+            'route': route.replace('^', '').replace('$', ''),
+            'method': request.method,
+            'status': response.status_code,
+            'queries': recorder.count,
+            'duplicates': recorder.duplicates(),
+            **{name: round(value, 3) for name, value in metrics.items()},
+        })
+        return response
+
+    def process_template_response(self, request, response):
+        # Вызывается после представления, но до отрисовки ответа DRF.
+        profile = getattr(request, 'profile', None)
+        if profile is None:
+            return response
+        recorder = profile['recorder']
+        profile['view_db'] = recorder.duration
+        render_started = time.perf_counter()
+        profile['view'] = render_started - profile['started']
+
+        def finish_render(rendered):
+            profile['render'] = time.perf_counter() - render_started
+
+        response.add_post_render_callback(finish_render)
+        return response
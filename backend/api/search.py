@@ -0,0 +1,247 @@
+"""
+Поиск по индексам в памяти процесса.
+
+IngredientIndex ищет ингредиенты по названию для автодополнения: держит
+отсортированный список названий и индекс триграмм. RecipyIndex заменяет
+полнотекстовый поиск PostgreSQL при работе на SQLite. Индексы
+перестраиваются при изменении версий пространств имён «ingredients» и
+«recipes» (см. api.cache).
+"""
+import heapq
+import math
+import re
+import threading
+from array import array
+from bisect import bisect_left
+from collections import Counter, defaultdict
+
+from recipys.models import Ingredient, IngredientsForRecipy, Recipy
+
+from .cache import get_version
+
+# Минимальная доля общих триграмм для нечёткого совпадения.
+SIMILARITY_THRESHOLD = 0.3
+
+
+def trigrams(text):
+    padded = f'  {text} '
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class IngredientIndex:
+    """Индекс названий ингредиентов в памяти процесса."""
+
+    def __init__(self):
+        self.version = None
+        self.names = []
+        self.ids = []
+        self.trigrams = {}
+        self.sizes = array('H')
+        self.lock = threading.Lock()
+
+    def build(self, rows):
+        """Строит индекс по парам (id, название)."""
+        rows = sorted((name.lower(), pk) for pk, name in rows)
+        names = [name for name, _ in rows]
+        index = {}
+        sizes = array('H')
+        for position, name in enumerate(names):
+            name_trigrams = trigrams(name)
+            sizes.append(len(name_trigrams))
+            for trigram in name_trigrams:
+                index.setdefault(trigram, array('I')).append(position)
+        # Подменяем все структуры разом, чтобы параллельные поиски
+        # не увидели наполовину построенный индекс.
+        self.names, self.ids, self.trigrams, self.sizes = (
+            names, [pk for _, pk in rows], index, sizes
+        )
+
+    def refresh(self):
+        version = get_version('ingredients')
+        if version == self.version:
+            return
+        with self.lock:
+            if version != self.version:
+                self.build(Ingredient.objects.values_list('id', 'name'))
+                self.version = version
+
+    def search(self, query, limit):
+        """
+        Id ингредиентов, подходящих под запрос, в порядке релевантности:
+        сначала совпадения по началу названия, затем по подстроке.
+        Если совпадений нет, ищутся похожие по триграммам названия.
+        """
+        self.refresh()
+        query = query.strip().lower()
+        if not query:
+            return []
+        found = self.search_prefix(query, limit)
+        if len(found) < limit:
+            found.extend(
+                self.search_substring(query, limit - len(found), set(found))
+            )
+        if not found:
+            # Похожие названия ищем, только если запрос ничего не нашёл,
+            # например из-за опечатки.
+            found = self.search_similar(query, limit)
+        return [self.ids[position] for position in found]
+
+    def search_prefix(self, query, limit):
+        names = self.names
+        found = []
+        position = bisect_left(names, query)
+        while (position < len(names) and len(found) < limit
+               and names[position].startswith(query)):
+            found.append(position)
+            position += 1
+        return found
+
+    def search_substring(self, query, limit, exclude):
+        names = self.names
+        if len(query) < 3:
+            # Для коротких запросов триграмм нет, просматриваем все названия.
+            candidates = range(len(names))
+        else:
+            # Название с подстрокой содержит все её триграммы, поэтому
+            # достаточно проверить самый короткий список вхождений.
+            candidates = min(
+                (self.trigrams.get(query[i:i + 3], ())
+                 for i in range(len(query) - 2)),
+                key=len
+            )
+        matches = (
+            (names[position].find(query), len(names[position]), position)
+            for position in candidates if position not in exclude
+        )
+        return [
+            position for _, _, position in heapq.nsmallest(
+                limit, (match for match in matches if match[0] >= 0)
+            )
+        ]
+
+    def search_similar(self, query, limit):
+        query_trigrams = trigrams(query)
+        shared = Counter()
+        for trigram in query_trigrams:
+            shared.update(self.trigrams.get(trigram, ()))
+        # Похожее название делит с запросом не меньше min_shared триграмм.
+        min_shared = math.ceil(SIMILARITY_THRESHOLD * len(query_trigrams))
+        ranked = []
+        for position, count in shared.items():
+            if count < min_shared:
+                continue
+            similarity = count / (
+                len(query_trigrams) + self.sizes[position] - count
+            )
+            if similarity >= SIMILARITY_THRESHOLD:
+                ranked.append((-similarity, position))
+        return [position for _, position in heapq.nsmallest(limit, ranked)]
+
+
+ingredient_index = IngredientIndex()
+
+
+# Вес слова в зависимости от поля рецепта, как веса A, B и C в PostgreSQL.
+FIELD_WEIGHTS = {
+    'name': 1.0,
+    'ingredients': 0.4,
+    'text': 0.2,
+}
+
+WORD = re.compile(r'\w+')
+
+
+def words(text):
+    return WORD.findall(text.lower().replace('ё', 'е'))
+
+
+class RecipyIndex:
+    """
+    Обратный индекс слов из названий, ингредиентов и описаний рецептов.
+    Слово запроса совпадает со всеми словами, которые с него начинаются.
+    """
+
+    def __init__(self):
+        self.version = None
+        self.terms = []
+        self.postings = []
+        self.size = 0
+        self.lock = threading.Lock()
+
+    def build(self, recipes, ingredients):
+        """
+        Строит индекс по тройкам (id, название, описание) и парам
+        (id рецепта, название ингредиента).
+        """
+        weights = defaultdict(lambda: defaultdict(float))
+        size = 0
+        for pk, name, text in recipes:
+            size += 1
+            for field, value in (('name', name), ('text', text)):
+                for word in words(value):
+                    weights[word][pk] += FIELD_WEIGHTS[field]
+        for pk, name in ingredients:
+            for word in words(name):
+                weights[word][pk] += FIELD_WEIGHTS['ingredients']
+        terms = sorted(weights)
+        self.terms, self.postings, self.size = (
+            terms, [dict(weights[term]) for term in terms], size
+        )
+
+    def refresh(self):
+        version = (get_version('recipes'), get_version('ingredients'))
+        if version == self.version:
+            return
+        with self.lock:
+            if version != self.version:
+                self.build(
+                    Recipy.objects.values_list('id', 'name', 'text'),
+                    IngredientsForRecipy.objects.values_list(
+                        'recipy_id', 'ingredient__name'
+                    )
+                )
+                self.version = version
+
+    def matches(self, word):
+        """Вес каждого рецепта по всем словам, начинающимся с word."""
+        found = defaultdict(float)
+        position = bisect_left(self.terms, word)
+        while (position < len(self.terms)
+               and self.terms[position].startswith(word)):
+            for pk, weight in self.postings[position].items():
+                found[pk] += weight
+            position += 1
+        return found
+
+    def search(self, query, limit):
+        """
+        Id рецептов, содержащих все слова запроса, по убыванию
+        релевантности. Редкие слова весят больше частых.
+        """
+        self.refresh()
+        scores = None
+        total = max(self.size, 1)
+        for word in set(words(query)):
+            found = self.matches(word)
+            rarity = math.log(1 + total / (1 + len(found)))
+            if scores is None:
+                scores = {
+                    pk: weight * rarity for pk, weight in found.items()
+                }
+            else:
+                scores = {
+                    pk: score + found[pk] * rarity
+                    for pk, score in scores.items() if pk in found
+                }
+            if not scores:
+                return []
+        if scores is None:
+            return []
+        return [
+            pk for _, pk in heapq.nlargest(
+                limit, ((score, pk) for pk, score in scores.items())
+            )
+        ]
+
+
+recipy_index = RecipyIndex()
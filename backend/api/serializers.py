@@ -1,6 +1,9 @@
+from datetime import timedelta
+
+from django.utils import timezone
 from drf_extra_fields.fields import Base64ImageField
 from recipys.models import (Basket, Favorite, Ingredient, IngredientsForRecipy,
-                            Recipy, Tag)
+                            MealPlanEntry, Recipy, Tag)
 from rest_framework import serializers
 from users.models import Follow, User
 
@@ -14,10 +17,60 @@ class UserSerializer(serializers.ModelSerializer):
         extra_kwargs = {'password': {'write_only': True}}
 
 
+class ImageRenditionField(serializers.ImageField):
+    """Уменьшенная копия изображения, а пока её нет — оригинал."""
+
+    def __init__(self, **kwargs):
+        kwargs['read_only'] = True
+        super().__init__(**kwargs)
+
+    def get_attribute(self, instance):
+        return super().get_attribute(instance) or instance.image
+
+
 class BriefRecipySerializer(serializers.ModelSerializer):
+    image_thumbnail = ImageRenditionField()
+    image_medium = ImageRenditionField()
+
     class Meta:
         model = Recipy
-        fields = ('id', 'name', 'image', 'cooking_time')
+        fields = ('id', 'name', 'image', 'image_thumbnail', 'image_medium',
+                  'cooking_time')
+
+
+class MatchedRecipySerializer(BriefRecipySerializer):
+    matched = serializers.IntegerField(read_only=True)
+    missing = serializers.IntegerField(read_only=True)
+
+    class Meta(BriefRecipySerializer.Meta):
+        fields = BriefRecipySerializer.Meta.fields + ('matched', 'missing')
+
+
+class BulkRecipesSerializer(serializers.Serializer):
+    """Список id рецептов для массового добавления или удаления."""
+    recipes = serializers.ListField(
+        child=serializers.IntegerField(min_value=1),
+        min_length=1,
+        max_length=500
+    )
+
+
+class WhatToCookSerializer(serializers.Serializer):
+    """Параметры подбора рецептов по имеющимся ингредиентам."""
+    ingredients = serializers.ListField(
+        child=serializers.IntegerField(min_value=1),
+        min_length=1,
+        max_length=100
+    )
+    limit = serializers.IntegerField(min_value=1, max_value=100, default=10)
+
+
+def get_recipes_limit(request):
+    """Значение параметра recipes_limit или None, если он не задан."""
+    recipes_limit = request.query_params.get('recipes_limit', '')
+    if recipes_limit.isdigit() and int(recipes_limit) > 0:
+        return int(recipes_limit)
+    return None
 
 
 class FollowSerializer(serializers.ModelSerializer):
@@ -28,7 +81,7 @@ class FollowSerializer(serializers.ModelSerializer):
     last_name = serializers.ReadOnlyField(source='author.last_name')
     is_subscribed = serializers.SerializerMethodField()
     recipes = serializers.SerializerMethodField()
-    recipes_count = serializers.SerializerMethodField()
+    recipes_count = serializers.ReadOnlyField(source='author.recipes_count')
 
     class Meta:
         model = Follow
@@ -39,30 +92,20 @@ class FollowSerializer(serializers.ModelSerializer):
         )
 
     def get_is_subscribed(self, obj):
-        user = self.context.get('request').user
-        return (
-            user.is_authenticated
-            and Follow.objects.filter(
-                user=user,
-                author=obj.author
-            ).exists()
-        )
+        # Подписка принадлежит текущему пользователю, лишний запрос не нужен.
+        return obj.user_id == self.context.get('request').user.id
 
     def get_recipes(self, obj):
-        request = self.context.get('request')
-        recipes_limit = request.GET.get('recipes_limit')
-        if recipes_limit:
-            recipes = Recipy.objects.filter(
-                author=obj.author
-            )[:int(recipes_limit)]
+        if hasattr(obj.author, 'limited_recipes'):
+            recipes = obj.author.limited_recipes
         else:
             recipes = Recipy.objects.filter(author=obj.author)
+            recipes_limit = get_recipes_limit(self.context.get('request'))
+            if recipes_limit:
+                recipes = recipes[:recipes_limit]
         serializer = BriefRecipySerializer(recipes, many=True)
         return serializer.data
 
-    def get_recipes_count(self, obj):
-        return Recipy.objects.filter(author=obj.author).count()
-
 
 class TagSerializer(serializers.ModelSerializer):
     class Meta:
@@ -112,16 +155,20 @@ class ReadRecipySerializer(serializers.ModelSerializer):
     ingredients = IngredientsForRecipySerializer(
         many=True,
         source='recipy')
+    image_thumbnail = ImageRenditionField()
+    image_medium = ImageRenditionField()
     is_favorited = serializers.SerializerMethodField()
     is_in_shopping_cart = serializers.SerializerMethodField()
 
     class Meta:
         model = Recipy
         fields = ('id', 'tags', 'author', 'ingredients', 'name',
-                  'image', 'text', 'cooking_time', 'is_favorited',
-                  'is_in_shopping_cart')
+                  'image', 'image_thumbnail', 'image_medium', 'text',
+                  'cooking_time', 'is_favorited', 'is_in_shopping_cart')
 
     def get_is_favorited(self, obj):
+        if hasattr(obj, 'is_favorited'):
+            return obj.is_favorited
         request = self.context.get('request')
         return (
             request.user.is_authenticated
@@ -132,6 +179,8 @@ class ReadRecipySerializer(serializers.ModelSerializer):
         )
 
     def get_is_in_shopping_cart(self, obj):
+        if hasattr(obj, 'is_in_shopping_cart'):
+            return obj.is_in_shopping_cart
         request = self.context.get('request')
         return (
             request.user.is_authenticated
@@ -150,6 +199,12 @@ class PostRecipySerializer(serializers.ModelSerializer):
     ingredients = IngredientsForRecipyEditSerializer(
         many=True,
         source='recipy')
+    # Связь с тегами идёт через явную модель, такие поля DRF делает
+    # только для чтения.
+    tags = serializers.PrimaryKeyRelatedField(
+        many=True,
+        queryset=Tag.objects.all()
+    )
 
     class Meta:
         model = Recipy
@@ -167,6 +222,10 @@ class PostRecipySerializer(serializers.ModelSerializer):
                 raise serializers.ValidationError(
                     'Ингредиенты повторяются')
             ingredients_list.append(ingredient['ingredient'])
+        ids = [ingredient['id'] for ingredient in ingredients_list]
+        if Ingredient.objects.filter(id__in=ids).count() != len(ids):
+            raise serializers.ValidationError(
+                'Такого ингредиента не существует')
         return value
 
     def validate_cooking_time(self, value):
@@ -201,3 +260,46 @@ class ShoppingCart(serializers.ModelSerializer):
     class Meta:
         model = Basket
         fields = '__all__'
+
+
+class MealPlanEntrySerializer(serializers.ModelSerializer):
+    recipe = serializers.PrimaryKeyRelatedField(
+        source='recipy',
+        queryset=Recipy.objects.all()
+    )
+
+    class Meta:
+        model = MealPlanEntry
+        fields = ('id', 'recipe', 'date', 'servings')
+
+    def to_representation(self, instance):
+        data = super().to_representation(instance)
+        data['recipe'] = BriefRecipySerializer(
+            instance.recipy,
+            context=self.context
+        ).data
+        return data
+
+
+# Наибольшая длина периода для списка покупок по плану питания.
+MEAL_PLAN_MAX_DAYS = 92
+
+
+class MealPlanPeriodSerializer(serializers.Serializer):
+    """
+    Период плана питания. По умолчанию — неделя, начиная с сегодняшнего
+    дня, без end — неделя, начиная со start.
+    """
+    start = serializers.DateField(required=False)
+    end = serializers.DateField(required=False)
+
+    def validate(self, attrs):
+        start = attrs.get('start') or timezone.localdate()
+        end = attrs.get('end') or start + timedelta(days=6)
+        if end < start:
+            raise serializers.ValidationError(
+                'Конец периода раньше его начала')
+        if (end - start).days >= MEAL_PLAN_MAX_DAYS:
+            raise serializers.ValidationError(
+                f'Период не может быть длиннее {MEAL_PLAN_MAX_DAYS} дней')
+        return {'start': start, 'end': end}
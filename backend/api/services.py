@@ -0,0 +1,57 @@
+from django.db.models import (Case, CharField, ExpressionWrapper, F,
+                              IntegerField, Sum, Value, When)
+from recipys.models import IngredientsForRecipy
+
+# Единицы, которые при сложении переводятся в более мелкие.
+UNIT_CONVERSIONS = {
+    'кг': ('г', 1000),
+    'л': ('мл', 1000),
+}
+
+
+def get_shopping_list(user):
+    """
+    Суммарное количество каждого ингредиента из корзины пользователя.
+    Считается одним сгруппированным запросом к базе.
+    """
+    return (
+        IngredientsForRecipy.objects
+        .filter(recipy__recipy_in_basket__user=user)
+        .values('ingredient__name', unit=F('ingredient__measurement_unit'))
+        .annotate(amount=Sum('amount'))
+        .order_by('ingredient__name', 'unit')
+    )
+
+
+def get_meal_plan_list(user, start, end):
+    """
+    Суммарное количество каждого ингредиента для блюд из плана питания
+    на даты с start по end включительно с учётом числа порций. Килограммы
+    и литры переводятся в граммы и миллилитры, чтобы складываться с ними.
+    Считается одним сгруппированным запросом к базе.
+    """
+    unit = Case(
+        *[When(ingredient__measurement_unit=source, then=Value(base_unit))
+          for source, (base_unit, _) in UNIT_CONVERSIONS.items()],
+        default=F('ingredient__measurement_unit'),
+        output_field=CharField()
+    )
+    factor = Case(
+        *[When(ingredient__measurement_unit=source, then=Value(factor))
+          for source, (_, factor) in UNIT_CONVERSIONS.items()],
+        default=Value(1),
+        output_field=IntegerField()
+    )
+    return (
+        IngredientsForRecipy.objects
+        .filter(
+            recipy__meal_plan__user=user,
+            recipy__meal_plan__date__range=(start, end)
+        )
+        .values('ingredient__name', unit=unit)
+        .annotate(amount=Sum(ExpressionWrapper(
+            F('amount') * F('recipy__meal_plan__servings') * factor,
+            output_field=IntegerField()
+        )))
+        .order_by('ingredient__name', 'unit')
+    )
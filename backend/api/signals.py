@@ -0,0 +1,100 @@
+import time
+
+from django.conf import settings
+from django.core.signals import request_finished, request_started
+from django.db import connections, transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from recipys.models import (Basket, Favorite, Ingredient, MealPlanEntry,
+                            Recipy, Tag)
+from rest_framework.authtoken.models import Token
+from users.models import User
+
+from .cache import bump_version
+
+
+@receiver(request_started)
+def check_connections(**kwargs):
+    """
+    Закрывает сохранённые с прошлых запросов соединения, которые база
+    уже разорвала, чтобы запрос открыл новое, а не упал с ошибкой.
+    Соединение, которым пользовались меньше DB_HEALTH_CHECK_IDLE секунд
+    назад, не проверяется: лишний SELECT 1 на каждый запрос дороже.
+    """
+    if not settings.DB_HEALTH_CHECKS:
+        return
+    checked_before = time.monotonic() - settings.DB_HEALTH_CHECK_IDLE
+    for connection in connections.all():
+        if (connection.connection is not None
+                and not connection.in_atomic_block
+                and getattr(connection, 'used_at', 0) < checked_before
+                and not connection.is_usable()):
+            connection.close()
+
+
+@receiver(request_finished)
+def remember_connections_use(**kwargs):
+    now = time.monotonic()
+    for connection in connections.all():
+        if connection.connection is not None:
+            connection.used_at = now
+
+
+@receiver([post_save, post_delete], sender=Tag)
+def tags_changed(**kwargs):
+    bump_version('tags')
+
+
+@receiver([post_save, post_delete], sender=Ingredient)
+def ingredients_changed(**kwargs):
+    bump_version('ingredients')
+
+
+@receiver([post_save, post_delete], sender=Recipy)
+def recipes_changed(instance, **kwargs):
+    # Ингредиенты рецепта меняются в той же транзакции после сохранения,
+    # поэтому версия увеличивается только после её фиксации. После
+    # удаления у объекта уже не будет pk, запоминаем его сейчас.
+    pk = instance.pk
+    transaction.on_commit(lambda: bump_version('recipes', pk))
+
+
+@receiver([post_save, post_delete], sender=Basket)
+def basket_changed(instance, **kwargs):
+    transaction.on_commit(
+        lambda: bump_version(f'basket:{instance.user_id}')
+    )
+
+
+@receiver([post_save, post_delete], sender=Favorite)
+def favorites_changed(instance, **kwargs):
+    transaction.on_commit(
+        lambda: bump_version(f'favorites:{instance.user_id}')
+    )
+
+
+@receiver([post_save, post_delete], sender=MealPlanEntry)
+def meal_plan_changed(instance, **kwargs):
+    transaction.on_commit(
+        lambda: bump_version(f'meal_plan:{instance.user_id}')
+    )
+
+
+@receiver(post_delete, sender=Token)
+def token_deleted(instance, **kwargs):
+    bump_version(f'token:{instance.key}')
+
+
+@receiver(post_save, sender=User)
+def user_changed(instance, created, update_fields, **kwargs):
+    """
+    Запомненные токены пользователя проверяются заново. Вход меняет только
+    last_login, после него сбрасывать нечего.
+    """
+    if created or (update_fields is not None
+                   and set(update_fields) <= {'last_login'}):
+        return
+    for key in Token.objects.filter(user=instance).values_list(
+        'key', flat=True
+    ):
+        bump_version(f'token:{key}')
@@ -0,0 +1,127 @@
+import threading
+
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.test import TestCase, TransactionTestCase
+from recipys.models import Favorite, Recipy
+from rest_framework.test import APIClient
+from users.models import User
+
+
+def create_recipes(author, count):
+    return [
+        Recipy.objects.create(
+            author=author,
+            name=f'рецепт {number}',
+            text='описание',
+            image='recipes/test.png',
+            cooking_time=10
+        )
+        for number in range(count)
+    ]
+
+
+class BulkFavoriteTest(TestCase):
+    """Массовое добавление в избранное и удаление из него."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create(
+            username='user', email='user@example.com', is_superuser=False
+        )
+        cls.recipes = create_recipes(cls.user, 3)
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def request(self, method, recipy_ids):
+        response = getattr(self.client, method)(
+            '/api/recipes/favorite/', {'recipes': recipy_ids}, format='json'
+        )
+        self.assertEqual(response.status_code, 200)
+        return [item['status'] for item in response.data['results']]
+
+    def counters(self):
+        return [
+            Recipy.objects.get(pk=recipy.pk).favorites_count
+            for recipy in self.recipes
+        ]
+
+    def test_create(self):
+        Favorite.objects.create(user=self.user, recipy=self.recipes[0])
+        statuses = self.request('post', [
+            self.recipes[0].id, self.recipes[1].id, self.recipes[1].id, 999
+        ])
+        self.assertEqual(statuses, ['exists', 'created', 'not_found'])
+        self.assertEqual(self.counters(), [1, 1, 0])
+
+    def test_delete(self):
+        for recipy in self.recipes[:2]:
+            Favorite.objects.create(user=self.user, recipy=recipy)
+        statuses = self.request('delete', [
+            self.recipes[0].id, self.recipes[2].id
+        ])
+        self.assertEqual(statuses, ['deleted', 'not_found'])
+        self.assertEqual(self.counters(), [0, 1, 0])
+        self.assertEqual(
+            list(Favorite.objects.values_list('recipy_id', flat=True)),
+            [self.recipes[1].id]
+        )
+
+
+class ConcurrentFavoriteTest(TransactionTestCase):
+    """
+    Рецепт, который параллельная транзакция добавляет в избранное того же
+    пользователя, не считается добавленным массовым запросом.
+    """
+
+    def setUp(self):
+        if connection.vendor != 'postgresql':
+            self.skipTest('Блокировки строк есть только в PostgreSQL.')
+        cache.clear()
+        self.user = User.objects.create(
+            username='user', email='user@example.com', is_superuser=False
+        )
+        self.recipes = create_recipes(self.user, 2)
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def add_in_parallel(self, locked, release):
+        try:
+            with transaction.atomic():
+                User.objects.select_for_update().get(pk=self.user.pk)
+                Favorite.objects.create(
+                    user=self.user, recipy=self.recipes[1]
+                )
+                locked.set()
+                release.wait(5)
+        finally:
+            connection.close()
+
+    def test_parallel_create(self):
+        locked, release = threading.Event(), threading.Event()
+        thread = threading.Thread(
+            target=self.add_in_parallel, args=(locked, release)
+        )
+        thread.start()
+        locked.wait(5)
+        # Запрос ждёт блокировку пользователя, поэтому отпускаем её чуть
+        # позже из таймера.
+        threading.Timer(0.5, release.set).start()
+        response = self.client.post('/api/recipes/favorite/', {
+            'recipes': [recipy.id for recipy in self.recipes]
+        }, format='json')
+        thread.join()
+        self.assertEqual(
+            [item['status'] for item in response.data['results']],
+            ['created', 'exists']
+        )
+        self.assertEqual(
+            [
+                Recipy.objects.get(pk=recipy.pk).favorites_count
+                for recipy in self.recipes
+            ],
+            [1, 1]
+        )
@@ -0,0 +1,66 @@
+import threading
+import time
+from unittest import mock
+
+from django.core.cache import cache
+from django.db import connection
+from django.test import TransactionTestCase
+from recipys.models import Recipy
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+from users.models import User
+
+from ..views import FavoriteViewSet
+
+
+class CoalescedWritesTest(TransactionTestCase):
+    """Одинаковые одновременные запросы выполняются один раз."""
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create(
+            username='user', email='user@example.com', is_superuser=False
+        )
+        self.token = Token.objects.create(user=self.user)
+        self.recipy = Recipy.objects.create(
+            author=self.user, name='рецепт', text='описание',
+            image='recipes/test.png', cooking_time=10
+        )
+
+    def post(self, responses):
+        try:
+            client = APIClient()
+            client.credentials(HTTP_AUTHORIZATION=f'Token {self.token.key}')
+            responses.append(
+                client.post(f'/api/recipes/{self.recipy.id}/favorite/')
+            )
+        finally:
+            connection.close()
+
+    def test_double_click(self):
+        create = FavoriteViewSet.create
+        calls = []
+
+        def slow_create(view, request, *args, **kwargs):
+            calls.append(view)
+            # Второй запрос успевает прийти, пока выполняется первый.
+            time.sleep(0.3)
+            return create(view, request, *args, **kwargs)
+
+        responses = []
+        with mock.patch.object(FavoriteViewSet, 'create', slow_create):
+            threads = [
+                threading.Thread(target=self.post, args=(responses,))
+                for _ in range(2)
+            ]
+            for thread in threads:
+                thread.start()
+                time.sleep(0.05)
+            for thread in threads:
+                thread.join()
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(
+            [response.status_code for response in responses], [201, 201]
+        )
+        self.assertEqual(responses[0].data, responses[1].data)
+        self.assertEqual(responses[0].content, responses[1].content)
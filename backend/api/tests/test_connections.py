@@ -0,0 +1,51 @@
+import time
+from unittest import mock
+
+from django.conf import settings
+from django.db import connection
+from django.test import TransactionTestCase
+from django.test.utils import override_settings
+
+from ..signals import check_connections
+
+
+@override_settings(DB_HEALTH_CHECKS=True, DB_HEALTH_CHECK_IDLE=10)
+class HealthCheckTest(TransactionTestCase):
+    """Соединение проверяется, только если долго простаивало."""
+
+    def setUp(self):
+        connection.ensure_connection()
+
+    def check(self, idle):
+        connection.used_at = time.monotonic() - idle
+        with mock.patch.object(
+            connection, 'is_usable', return_value=False
+        ) as is_usable, mock.patch.object(connection, 'close') as close:
+            check_connections()
+        return is_usable.called, close.called
+
+    def test_recently_used(self):
+        self.assertEqual(self.check(idle=1), (False, False))
+
+    def test_idle(self):
+        self.assertEqual(self.check(idle=60), (True, True))
+
+
+class PooledConnectionTest(TransactionTestCase):
+    """Соединения пула возвращаются в него и переиспользуются."""
+
+    def setUp(self):
+        if settings.DATABASES['default']['ENGINE'] != 'foodgram.db.pooled':
+            self.skipTest('Нужен DB_ENGINE=foodgram.db.pooled.')
+
+    def test_reuse(self):
+        connection.close()
+        connection.ensure_connection()
+        raw = connection.connection
+        pool = connection.pool
+        connection.close()
+        self.assertIn(id(raw), pool.returned_at)
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT 1')
+            self.assertEqual(cursor.fetchone(), (1,))
+        self.assertIs(connection.connection, raw)
@@ -0,0 +1,90 @@
+import datetime
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import AsyncClient, TestCase, TransactionTestCase
+from recipys.models import (Basket, Ingredient, IngredientsForRecipy,
+                            MealPlanEntry, Recipy)
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+from users.models import User
+
+URL = '/api/recipes/download_shopping_cart/?format=pdf'
+
+
+def create_recipy(author):
+    recipy = Recipy.objects.create(
+        author=author, name='рецепт', text='описание',
+        image='recipes/test.png', cooking_time=10
+    )
+    IngredientsForRecipy.objects.create(
+        recipy=recipy, amount=5,
+        ingredient=Ingredient.objects.create(
+            name='соль', measurement_unit='г'
+        )
+    )
+    return recipy
+
+
+class AsgiExportTest(TransactionTestCase):
+    """Под ASGI файл собирается в потоке представления, а не в цикле."""
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create(
+            username='user', email='user@example.com', is_superuser=False
+        )
+        self.token = Token.objects.create(user=self.user)
+        Basket.objects.create(user=self.user, recipy=create_recipy(self.user))
+
+    def test_wsgi_streams(self):
+        client = APIClient()
+        client.force_authenticate(self.user)
+        response = client.get(URL)
+        self.assertTrue(response.streaming)
+        self.assertTrue(b''.join(response.streaming_content).startswith(
+            b'%PDF'
+        ))
+
+    async def test_asgi_whole_file(self):
+        response = await AsyncClient().get(
+            URL, authorization=f'Token {self.token.key}'
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(response.streaming)
+        self.assertTrue(response.content.startswith(b'%PDF'))
+        self.assertEqual(
+            response['Content-Disposition'],
+            'attachment; filename="grocery_list.pdf"'
+        )
+
+
+class MealPlanExportTest(TestCase):
+    """Файл по плану питания не устаревает, если версия не увеличилась."""
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create(
+            username='user', email='user@example.com', is_superuser=False
+        )
+        self.entry = MealPlanEntry.objects.create(
+            user=self.user, recipy=create_recipy(self.user),
+            date=datetime.date(2026, 1, 5)
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def download(self):
+        response = self.client.get(
+            '/api/meal_plan/download_shopping_list/'
+            '?start=2026-01-05&end=2026-01-11&format=txt'
+        )
+        return response.getvalue()
+
+    def test_missed_version_bump(self):
+        self.assertIn('соль: 5 г'.encode(), self.download())
+        # Воркер не узнал об изменении: версия плана не увеличилась.
+        with mock.patch('api.signals.bump_version'):
+            self.entry.servings = 2
+            self.entry.save()
+        self.assertIn('соль: 10 г'.encode(), self.download())
@@ -0,0 +1,73 @@
+import os
+import shutil
+import tempfile
+from io import BytesIO
+from unittest import mock
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.test import TestCase, override_settings
+from PIL import Image
+from recipys.models import Recipy
+from users.models import User
+
+from .. import images
+
+
+def png():
+    buffer = BytesIO()
+    Image.new('RGB', (1000, 500), 'red').save(buffer, 'PNG')
+    return ContentFile(buffer.getvalue())
+
+
+class ProcessImageTest(TestCase):
+    """Перекодированный оригинал заменяет старый только после обновления."""
+
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root, ignore_errors=True)
+        media = override_settings(MEDIA_ROOT=self.media_root)
+        media.enable()
+        self.addCleanup(media.disable)
+        author = User.objects.create(
+            username='author', email='author@example.com', is_superuser=False
+        )
+        self.recipy = Recipy(
+            author=author, name='рецепт', text='описание', cooking_time=10
+        )
+        self.recipy.image.save('photo.png', png(), save=False)
+        self.recipy.save()
+
+    def test_replaces_original(self):
+        old_name = self.recipy.image.name
+        images.process_image(self.recipy.pk, old_name)
+        self.recipy.refresh_from_db()
+        self.assertNotEqual(self.recipy.image.name, old_name)
+        self.assertTrue(default_storage.exists(self.recipy.image.name))
+        self.assertFalse(default_storage.exists(old_name))
+        for field in ('image_thumbnail', 'image_medium'):
+            self.assertTrue(default_storage.exists(
+                getattr(self.recipy, field).name
+            ))
+
+    def test_image_replaced_meanwhile(self):
+        old_name = self.recipy.image.name
+        encode = images.encode
+
+        def replace_and_encode(image, image_format):
+            # Пока изображение обрабатывается, автор загружает другое.
+            Recipy.objects.filter(pk=self.recipy.pk).update(
+                image='recipes/other.png'
+            )
+            return encode(image, image_format)
+
+        with mock.patch.object(images, 'encode', replace_and_encode):
+            images.process_image(self.recipy.pk, old_name)
+        self.recipy.refresh_from_db()
+        self.assertEqual(self.recipy.image.name, 'recipes/other.png')
+        self.assertEqual(self.recipy.image_thumbnail.name, '')
+        # Новые файлы удалены, старый остался нетронутым.
+        files = []
+        for _, _, names in os.walk(self.media_root):
+            files.extend(names)
+        self.assertEqual(files, [os.path.basename(old_name)])
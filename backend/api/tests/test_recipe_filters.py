@@ -0,0 +1,72 @@
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from recipys.models import Recipy, Tag
+from rest_framework.test import APIClient
+from users.models import User
+
+
+class TagFilterTest(TestCase):
+    """Фильтр рецептов по тегам."""
+
+    @classmethod
+    def setUpTestData(cls):
+        author = User.objects.create(
+            username='author', email='author@example.com', is_superuser=False
+        )
+        cls.tags = [
+            Tag.objects.create(name=f'тег {number}', slug=f'tag{number}')
+            for number in range(3)
+        ]
+        cls.recipes = []
+        for tags in (cls.tags[:2], cls.tags[:1], cls.tags[2:]):
+            recipy = Recipy.objects.create(
+                author=author,
+                name='рецепт',
+                text='описание',
+                image='recipes/test.png',
+                cooking_time=10
+            )
+            recipy.tags.set(tags)
+            cls.recipes.append(recipy)
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+
+    def get_ids(self, query):
+        response = self.client.get(f'/api/recipes/?{query}')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            response.data['count'], len(response.data['results'])
+        )
+        return [recipy['id'] for recipy in response.data['results']]
+
+    def test_recipe_with_two_tags_once(self):
+        self.assertEqual(
+            sorted(self.get_ids('tags=tag0&tags=tag1')),
+            [self.recipes[0].id, self.recipes[1].id]
+        )
+
+    def test_unknown_slug(self):
+        self.assertEqual(self.get_ids('tags=unknown'), [])
+
+    def test_exists_subquery(self):
+        with CaptureQueriesContext(connection) as context:
+            self.get_ids('tags=tag0&tags=tag1')
+        page = [
+            query['sql'] for query in context.captured_queries
+            if query['sql'].startswith('SELECT "recipys_recipy"."id"')
+        ]
+        self.assertEqual(len(page), 1)
+        self.assertIn('EXISTS(SELECT', page[0])
+        # Теги присоединяются только внутри подзапроса, без DISTINCT.
+        self.assertNotIn('DISTINCT', page[0])
+        self.assertNotIn('JOIN "recipys_recipy_tags"', page[0])
+
+    def test_query_count(self):
+        # Слаги переводятся в id один раз, дальше — из кэша.
+        self.get_ids('tags=tag2')
+        with self.assertNumQueries(4):
+            self.get_ids('tags=tag0&tags=tag1')
@@ -0,0 +1,106 @@
+from django.core.cache import cache
+from django.test import TestCase
+from recipys.models import (Basket, Favorite, Ingredient, IngredientsForRecipy,
+                            Recipy, Tag)
+from rest_framework.test import APIClient
+from users.models import User
+
+
+def create_recipes(author, count, tags, ingredients):
+    Recipy.objects.bulk_create(
+        Recipy(
+            author=author,
+            name=f'рецепт {number}',
+            text='описание',
+            image='recipes/test.png',
+            cooking_time=10
+        )
+        for number in range(count)
+    )
+    # bulk_create на SQLite не заполняет id, поэтому читаем заново.
+    recipes = list(Recipy.objects.order_by('id'))
+    for recipy in recipes:
+        recipy.tags.set(tags)
+    IngredientsForRecipy.objects.bulk_create(
+        IngredientsForRecipy(recipy=recipy, ingredient=ingredient, amount=1)
+        for recipy in recipes
+        for ingredient in ingredients
+    )
+    return recipes
+
+
+class RecipeQueriesTest(TestCase):
+    """Число запросов к базе не зависит от размера страницы."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create(
+            username='user', email='user@example.com', is_superuser=False
+        )
+        tags = [
+            Tag.objects.create(name=f'тег {number}', slug=f'tag{number}')
+            for number in range(2)
+        ]
+        ingredients = [
+            Ingredient.objects.create(
+                name=f'ингредиент {number}', measurement_unit='г'
+            )
+            for number in range(3)
+        ]
+        cls.recipes = create_recipes(cls.user, 20, tags, ingredients)
+        Favorite.objects.create(user=cls.user, recipy=cls.recipes[0])
+        Basket.objects.create(user=cls.user, recipy=cls.recipes[1])
+
+    def setUp(self):
+        # Версии и ответы из кэша меняют число запросов.
+        cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_list(self):
+        for limit in (2, 20):
+            with self.subTest(limit=limit), self.assertNumQueries(4):
+                response = self.client.get(f'/api/recipes/?limit={limit}')
+            self.assertEqual(len(response.data['results']), limit)
+
+    def test_list_not_modified(self):
+        response = self.client.get('/api/recipes/?limit=2')
+        etag = response['ETag']
+        # Для 304 читается только страница, без тегов и ингредиентов.
+        with self.assertNumQueries(2):
+            response = self.client.get(
+                '/api/recipes/?limit=2', HTTP_IF_NONE_MATCH=etag
+            )
+        self.assertEqual(response.status_code, 304)
+        Favorite.objects.create(user=self.user, recipy=self.recipes[-1])
+        response = self.client.get(
+            '/api/recipes/?limit=2', HTTP_IF_NONE_MATCH=etag
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_cursor_list_not_modified(self):
+        url = '/api/recipes/?pagination=cursor&limit=2'
+        etag = self.client.get(url)['ETag']
+        with self.assertNumQueries(1):
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+    def test_list_flags(self):
+        response = self.client.get('/api/recipes/?limit=20')
+        flags = {
+            recipy['id']: (
+                recipy['is_favorited'], recipy['is_in_shopping_cart']
+            )
+            for recipy in response.data['results']
+        }
+        self.assertEqual(flags[self.recipes[0].id], (True, False))
+        self.assertEqual(flags[self.recipes[1].id], (False, True))
+        self.assertEqual(flags[self.recipes[2].id], (False, False))
+
+    def test_retrieve(self):
+        with self.assertNumQueries(4):
+            response = self.client.get(f'/api/recipes/{self.recipes[0].id}/')
+        self.assertTrue(response.data['is_favorited'])
+        self.assertEqual(len(response.data['ingredients']), 3)
+        self.assertEqual(len(response.data['tags']), 2)
@@ -0,0 +1,66 @@
+from django.core.cache import cache
+from django.test import TestCase
+from recipys.models import Ingredient, IngredientsForRecipy, Recipy
+from rest_framework.test import APIClient
+from users.models import User
+
+
+class SearchSyncTest(TestCase):
+    """Поиск видит изменения рецептов, сделанные в обход API."""
+
+    @classmethod
+    def setUpTestData(cls):
+        author = User.objects.create(
+            username='author', email='author@example.com', is_superuser=False
+        )
+        cls.ingredient = Ingredient.objects.create(
+            name='картофель', measurement_unit='г'
+        )
+        cls.recipy = Recipy.objects.create(
+            author=author,
+            name='пюре',
+            text='описание',
+            image='recipes/test.png',
+            cooking_time=10
+        )
+        IngredientsForRecipy.objects.create(
+            recipy=cls.recipy, ingredient=cls.ingredient, amount=1
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+
+    def search(self, query):
+        response = self.client.get('/api/recipes/', {'search': query})
+        return [recipy['id'] for recipy in response.data['results']]
+
+    def test_created(self):
+        self.assertEqual(self.search('картофель'), [self.recipy.id])
+
+    def test_recipy_renamed(self):
+        # Версии кэша увеличиваются после фиксации транзакции.
+        with self.captureOnCommitCallbacks(execute=True):
+            self.recipy.name = 'запеканка'
+            self.recipy.save()
+        self.assertEqual(self.search('запеканка'), [self.recipy.id])
+        self.assertEqual(self.search('пюре'), [])
+
+    def test_ingredient_renamed(self):
+        self.ingredient.name = 'батат'
+        self.ingredient.save()
+        self.assertEqual(self.search('батат'), [self.recipy.id])
+        self.assertEqual(self.search('картофель'), [])
+
+    def test_ingredients_bulk_created(self):
+        ingredient = Ingredient.objects.create(
+            name='сливки', measurement_unit='мл'
+        )
+        with self.captureOnCommitCallbacks(execute=True):
+            IngredientsForRecipy.objects.bulk_create([IngredientsForRecipy(
+                recipy=self.recipy, ingredient=ingredient, amount=1
+            )])
+            # bulk_create не отправляет сигналы, версию рецептов
+            # увеличивает API.
+            self.recipy.save()
+        self.assertEqual(self.search('сливки'), [self.recipy.id])
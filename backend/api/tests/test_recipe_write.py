@@ -0,0 +1,96 @@
+import shutil
+import tempfile
+
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from recipys.models import Ingredient, IngredientsForRecipy, Recipy, Tag
+from rest_framework.test import APIClient
+from users.models import User
+
+# PNG 1×1.
+IMAGE = (
+    'data:image/png;base64,iVBORw0KGgoAAAANSUhEUgAAAAEAAAABCAYAAAAfFcSJAAAA'
+    'DUlEQVR42mP8z8BQDwAEhQGAhKmMIQAAAABJRU5ErkJggg=='
+)
+MEDIA_ROOT = tempfile.mkdtemp()
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT)
+class RecipeWriteTest(TestCase):
+    """Создание и изменение рецепта — постоянное число запросов."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create(
+            username='user', email='user@example.com', is_superuser=False
+        )
+        cls.tags = [
+            Tag.objects.create(name=f'тег {number}', slug=f'tag{number}')
+            for number in range(3)
+        ]
+        cls.ingredients = [
+            Ingredient.objects.create(
+                name=f'ингредиент {number}', measurement_unit='г'
+            )
+            for number in range(15)
+        ]
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def payload(self, ingredients, amount=1):
+        return {
+            'name': 'рецепт',
+            'text': 'описание',
+            'cooking_time': 10,
+            'image': IMAGE,
+            'tags': [tag.id for tag in self.tags[:2]],
+            'ingredients': [
+                {'id': ingredient.id, 'amount': amount}
+                for ingredient in ingredients
+            ],
+        }
+
+    def create(self, ingredients):
+        return self.client.post(
+            '/api/recipes/', self.payload(ingredients), format='json'
+        )
+
+    def test_create(self):
+        for count in (2, 10):
+            with self.subTest(ingredients=count), self.assertNumQueries(13):
+                response = self.create(self.ingredients[:count])
+            self.assertEqual(response.status_code, 201)
+            self.assertEqual(len(response.data['ingredients']), count)
+        self.assertEqual(Recipy.objects.count(), 2)
+
+    def test_update(self):
+        recipy_id = self.create(self.ingredients[:10]).data['id']
+        changed = {
+            'tags': [tag.id for tag in self.tags[1:]],
+            'ingredients': [
+                {'id': ingredient.id, 'amount': 2}
+                for ingredient in self.ingredients[5:15]
+            ],
+        }
+        with self.assertNumQueries(17):
+            response = self.client.patch(
+                f'/api/recipes/{recipy_id}/', changed, format='json'
+            )
+        self.assertEqual(response.status_code, 200)
+        # Изменение не создаёт новый рецепт и не оставляет старые
+        # ингредиенты.
+        self.assertEqual(Recipy.objects.count(), 1)
+        self.assertEqual(
+            set(IngredientsForRecipy.objects.filter(
+                recipy_id=recipy_id
+            ).values_list('ingredient_id', 'amount')),
+            {(ingredient.id, 2) for ingredient in self.ingredients[5:15]}
+        )
@@ -0,0 +1,28 @@
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import SimpleTestCase
+from foodgram.db.routers import stick_to_primary, sticks_to_primary
+
+from ..cache import bump_version
+
+
+@mock.patch('foodgram.db.routers.replica_aliases', return_value=['replica'])
+class StickyPrimaryTest(SimpleTestCase):
+    """За основной базой закрепляются автор изменений, теги и ингредиенты."""
+
+    def setUp(self):
+        cache.clear()
+
+    def test_namespaces(self, replica_aliases):
+        for namespace in ('recipes', 'favorites:1', 'token:key'):
+            bump_version(namespace)
+            self.assertFalse(sticks_to_primary([f'namespace:{namespace}']))
+        for namespace in ('tags', 'ingredients'):
+            bump_version(namespace)
+            self.assertTrue(sticks_to_primary([f'namespace:{namespace}']))
+
+    def test_user(self, replica_aliases):
+        stick_to_primary('user:1')
+        self.assertTrue(sticks_to_primary(['user:1']))
+        self.assertFalse(sticks_to_primary(['user:2']))
@@ -0,0 +1,64 @@
+from django.core.cache import cache
+from django.test import TestCase
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+from users.models import User
+
+from ..authentication import token_cache
+from ..cache import get_version
+
+
+class TokenCacheTest(TestCase):
+    """Запомненный токен сбрасывается только изменениями его владельца."""
+
+    def setUp(self):
+        cache.clear()
+        token_cache.clear()
+        self.user = self.create_user('user')
+        self.other = self.create_user('other')
+        self.client = APIClient()
+
+    def create_user(self, username):
+        user = User.objects.create(
+            username=username, email=f'{username}@example.com',
+            is_superuser=False
+        )
+        user.set_password('password')
+        user.save()
+        return user
+
+    def login(self, user):
+        response = self.client.post('/api/auth/token/login/', {
+            'email': user.email, 'password': 'password'
+        })
+        return response.data['auth_token']
+
+    def versions(self, *keys):
+        return [get_version(f'token:{key}') for key in keys]
+
+    def test_login_changes_nothing(self):
+        key = Token.objects.create(user=self.user).key
+        before = self.versions(key)
+        recipes = self.client.get('/api/recipes/')['ETag']
+        self.login(self.other)
+        self.login(self.user)
+        self.assertEqual(self.versions(key), before)
+        self.assertEqual(self.client.get('/api/recipes/')['ETag'], recipes)
+
+    def test_user_change(self):
+        key = Token.objects.create(user=self.user).key
+        other_key = Token.objects.create(user=self.other).key
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {key}')
+        self.assertEqual(self.client.get('/api/users/me/').status_code, 200)
+        other_before = self.versions(other_key)
+        self.user.is_active = False
+        self.user.save()
+        self.assertEqual(self.versions(other_key), other_before)
+        self.assertEqual(self.client.get('/api/users/me/').status_code, 401)
+
+    def test_logout(self):
+        key = self.login(self.user)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {key}')
+        self.assertEqual(self.client.get('/api/users/me/').status_code, 200)
+        self.client.post('/api/auth/token/logout/')
+        self.assertEqual(self.client.get('/api/users/me/').status_code, 401)
@@ -0,0 +1,54 @@
+from django.core.cache import cache
+from django.test import TestCase
+from django.utils import timezone
+from recipys.models import Recipy, TrendingRecipy
+from rest_framework.test import APIClient
+from users.models import User
+
+
+class TrendingPaginationTest(TestCase):
+    """Рейтинг листается по курсору без пропусков и повторов."""
+
+    @classmethod
+    def setUpTestData(cls):
+        author = User.objects.create(
+            username='author', email='author@example.com', is_superuser=False
+        )
+        recipes = [
+            Recipy.objects.create(
+                author=author,
+                name=f'рецепт {number}',
+                text='описание',
+                image='recipes/test.png',
+                cooking_time=10
+            )
+            for number in range(7)
+        ]
+        # Одинаковые очки у нескольких рецептов упорядочиваются по id.
+        scores = [3.5, 1.0, 3.5, 2.25, 1.0, 3.5, 0.5]
+        TrendingRecipy.objects.bulk_create(
+            TrendingRecipy(recipy=recipy, score=score,
+                           updated_at=timezone.now())
+            for recipy, score in zip(recipes, scores)
+        )
+        cls.expected = [
+            recipy.id for recipy, _ in sorted(
+                zip(recipes, scores),
+                key=lambda pair: (-pair[1], -pair[0].id)
+            )
+        ]
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+
+    def test_walk(self):
+        found = []
+        url = '/api/recipes/trending/?limit=2'
+        while url:
+            with self.assertNumQueries(3):
+                response = self.client.get(url)
+            self.assertNotIn('count', response.data)
+            found.extend(recipy['id'] for recipy in response.data['results'])
+            url = response.data['next']
+        self.assertEqual(found, self.expected)
@@ -0,0 +1,190 @@
+"""
+Защита частых операций записи: подписок, избранного и корзины.
+
+TokenBucketThrottle ограничивает частоту запросов пользователя к каждому
+эндпойнту, CoalescedWritesMixin выполняет одинаковые одновременные
+запросы один раз: повторы и двойные нажатия получают тот же ответ.
+Объединение запросов, как и лимит в LocalBuckets, действует в пределах
+одного процесса.
+"""
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import cache
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework.response import Response
+from rest_framework.throttling import ScopedRateThrottle
+
+
+class LocalBuckets:
+    """
+    Корзины токенов в памяти процесса. Самые давние вытесняются, а
+    вытесненная корзина считается полной.
+    """
+
+    def __init__(self, max_size):
+        self.max_size = max_size
+        self.buckets = OrderedDict()
+        self.lock = threading.Lock()
+
+    def take(self, key, capacity, duration):
+        """Берёт токен. Возвращает 0 или сколько секунд ждать следующего."""
+        with self.lock:
+            now = time.monotonic()
+            tokens, updated = self.buckets.pop(key, (capacity, now))
+            tokens, wait = take_token(tokens, updated, now, capacity, duration)
+            self.buckets[key] = (tokens, now)
+            while len(self.buckets) > self.max_size:
+                self.buckets.popitem(last=False)
+            return wait
+
+
+class CacheBuckets:
+    """
+    Корзины токенов в общем кэше, одни на все процессы. Чтение и запись
+    не атомарны, при одновременных запросах лимит может быть превышен на
+    несколько запросов.
+    """
+
+    def take(self, key, capacity, duration):
+        now = time.time()
+        tokens, updated = cache.get(key, (capacity, now))
+        tokens, wait = take_token(tokens, updated, now, capacity, duration)
+        # За duration секунд корзина наполняется целиком, хранить её дольше
+        # незачем.
+        cache.set(key, (tokens, now), duration)
+        return wait
+
+
+def take_token(tokens, updated, now, capacity, duration):
+    """Новое число токенов и время ожидания, если токенов не хватило."""
+    refill_rate = capacity / duration
+    tokens = min(capacity, tokens + (now - updated) * refill_rate)
+    if tokens >= 1:
+        return tokens - 1, 0
+    return tokens, (1 - tokens) / refill_rate
+
+
+if settings.THROTTLE_SHARED_CACHE:
+    buckets = CacheBuckets()
+else:
+    buckets = LocalBuckets(settings.THROTTLE_LOCAL_SIZE)
+
+
+class TokenBucketThrottle(ScopedRateThrottle):
+    """
+    Ограничение частоты изменяющих запросов по алгоритму token bucket.
+    Лимит задаётся для throttle_scope вьюсета в DEFAULT_THROTTLE_RATES:
+    при «30/min» можно сделать 30 запросов подряд, а дальше — по одному
+    каждые 2 секунды.
+    """
+
+    def allow_request(self, request, view):
+        self.scope = getattr(view, self.scope_attr, None)
+        if not self.scope or request.method in SAFE_METHODS:
+            return True
+        self.rate = self.get_rate()
+        self.num_requests, self.duration = self.parse_rate(self.rate)
+        key = self.get_cache_key(request, view)
+        if key is None:
+            return True
+        self.wait_time = buckets.take(key, self.num_requests, self.duration)
+        return not self.wait_time
+
+    def wait(self):
+        return self.wait_time
+
+
+class InFlightCall:
+    def __init__(self):
+        self.done = threading.Event()
+        self.response = None
+        self.error = None
+
+
+class InFlightRequests:
+    """Одинаковые запросы, которые выполняются в этом процессе."""
+
+    def __init__(self):
+        self.calls = {}
+        self.lock = threading.Lock()
+
+    def run(self, key, handler, share):
+        """
+        Выполняет handler(), если такой же запрос ещё не выполняется.
+        Иначе ждёт его и возвращает share(ответ первого запроса).
+        """
+        with self.lock:
+            call = self.calls.get(key)
+            leader = call is None
+            if leader:
+                call = self.calls[key] = InFlightCall()
+        if not leader:
+            return self.follow(call, handler, share)
+        try:
+            call.response = handler()
+        except Exception as error:
+            call.error = error
+            raise
+        finally:
+            with self.lock:
+                del self.calls[key]
+            call.done.set()
+        return call.response
+
+    def follow(self, call, handler, share):
+        if not call.done.wait(settings.COALESCE_TIMEOUT):
+            # Первый запрос завис, выполняем свой.
+            return handler()
+        if call.error is not None:
+            raise call.error
+        return share(call.response)
+
+
+in_flight = InFlightRequests()
+
+
+class CoalescedWritesMixin:
+    """
+    Одинаковые одновременные изменяющие запросы (тот же токен, метод,
+    адрес и тело) выполняются один раз, остальные ждут и получают копию
+    ответа. Запросы объединяются только внутри одного процесса: в разных
+    воркерах одинаковые запросы выполняются каждый сам по себе.
+    """
+
+    def dispatch(self, request, *args, **kwargs):
+        if request.method in SAFE_METHODS:
+            return super().dispatch(request, *args, **kwargs)
+        key = hashlib.md5('\n'.join((
+            request.META.get('HTTP_AUTHORIZATION', ''),
+            request.method,
+            request.get_full_path(),
+        )).encode() + request.body).hexdigest()
+        return in_flight.run(
+            key,
+            lambda: super(CoalescedWritesMixin, self).dispatch(
+                request, *args, **kwargs
+            ),
+            lambda response: self.shared_response(
+                request, response, *args, **kwargs
+            )
+        )
+
+    def shared_response(self, request, response, *args, **kwargs):
+        """
+        Копия ответа первого запроса для этого запроса. Ответ отрисовывается
+        после представления, поэтому у каждого запроса свой объект.
+        """
+        self.args = args
+        self.kwargs = kwargs
+        self.request = self.initialize_request(request, *args, **kwargs)
+        self.headers = self.default_response_headers
+        copy = Response(
+            response.data,
+            status=response.status_code,
+            headers=dict(response.items())
+        )
+        return self.finalize_response(self.request, copy, *args, **kwargs)
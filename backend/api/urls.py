@@ -2,15 +2,32 @@ from django.urls import include, path
 from rest_framework.routers import DefaultRouter
 
 from .views import (FavoriteViewSet, FollowViewSet, IngredientViewSet,
-                    RecipyVeiwSet, ShoppingCartViewSet, SubscribeViewSet,
-                    TagViewSet, download_shopping_cart)
+                    MealPlanViewSet, RecipyVeiwSet, ShoppingCartViewSet,
+                    SubscribeViewSet, TagViewSet, download_meal_plan,
+                    download_shopping_cart)
 
 router = DefaultRouter()
 router.register(r'ingredients', IngredientViewSet)
 router.register(r'tags', TagViewSet)
 router.register(r'recipes', RecipyVeiwSet)
+router.register(r'meal_plan', MealPlanViewSet, basename='meal_plan')
 
 urlpatterns = [
+    # Раньше маршрутов роутера, иначе favorite примется за id рецепта.
+    path(
+        'recipes/favorite/',
+        FavoriteViewSet.as_view({
+            'post': 'bulk_create',
+            'delete': 'bulk_delete'
+        }),
+        name='favorite_bulk'),
+    path(
+        'recipes/shopping_cart/',
+        ShoppingCartViewSet.as_view({
+            'post': 'bulk_create',
+            'delete': 'bulk_delete'
+        }),
+        name='shopping_cart_bulk'),
     path(
         r'recipes/<recipe_id>/favorite/',
         FavoriteViewSet.as_view({
@@ -30,6 +47,11 @@ urlpatterns = [
         download_shopping_cart,
         name='download_shopping_cart'
     ),
+    path(
+        'meal_plan/download_shopping_list/',
+        download_meal_plan,
+        name='download_meal_plan'
+    ),
     path(
         'users/subscriptions/',
         FollowViewSet.as_view({'get': 'list'}),
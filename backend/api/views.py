@@ -1,21 +1,44 @@
 from http import HTTPStatus
 
-from django.http import HttpResponse
+from asgiref.sync import sync_to_async
+from django.core.handlers.asgi import ASGIRequest
+from django.db import IntegrityError, connection, transaction
+from django.db.models import (F, OuterRef, Prefetch, Subquery,
+                              prefetch_related_objects)
+from django.http import HttpResponseNotAllowed, JsonResponse
 from django.shortcuts import get_object_or_404
+from django.utils import timezone
 from django_filters.rest_framework import DjangoFilterBackend
-from recipys.models import Basket, Favorite, Ingredient, Recipy, Tag
-from rest_framework import mixins, viewsets
-from rest_framework.decorators import api_view
+from foodgram.db.routers import ReplicaReadMixin
+from recipys.counters import change_counters
+from recipys.models import Basket, Favorite, Ingredient, Recipy, RecipyTag, Tag
+from rest_framework import mixins, permissions, viewsets
+from rest_framework.decorators import action
+from rest_framework.exceptions import AuthenticationFailed, NotAuthenticated
+from rest_framework.request import Request
 from rest_framework.response import Response
+from rest_framework.settings import api_settings
 from users.models import Follow, User
 
+from .cache import (CachedResponseMixin, ConditionalResponseMixin,
+                    bump_version, get_version, make_etag)
+from .exports import (EXPORTERS, choose_exporter, meal_plan_response,
+                      read_whole, shopping_list_response)
 from .filter import IngredientFilter, RecipyFilter
+from .images import schedule_renditions
+from .matching import recipy_matcher
+from .paginations import (LimitNumberPagePagination, RecipyCursorPagination,
+                          TrendingCursorPagination)
 from .permissions import AdminPermission, AuthorOrReadOnly
-from .serializers import (BriefRecipySerializer, FavoriteSerializer,
-                          FollowSerializer, IngredientSerializer,
-                          IngredientsForRecipy, PostRecipySerializer,
+from .serializers import (BriefRecipySerializer, BulkRecipesSerializer,
+                          FavoriteSerializer, FollowSerializer,
+                          IngredientSerializer, IngredientsForRecipy,
+                          MatchedRecipySerializer, MealPlanEntrySerializer,
+                          MealPlanPeriodSerializer, PostRecipySerializer,
                           ReadRecipySerializer, ShoppingCart,
-                          SubscribeSerializer, TagSerializer, UserSerializer)
+                          SubscribeSerializer, TagSerializer, UserSerializer,
+                          WhatToCookSerializer, get_recipes_limit)
+from .throttling import CoalescedWritesMixin, TokenBucketThrottle
 
 
 class UserViewSet(viewsets.ReadOnlyModelViewSet):
@@ -35,15 +58,39 @@ class UserViewSet(viewsets.ReadOnlyModelViewSet):
         return user
 
 
-class FollowViewSet(viewsets.ReadOnlyModelViewSet):
+class FollowViewSet(ReplicaReadMixin, viewsets.ReadOnlyModelViewSet):
     serializer_class = FollowSerializer
+    permission_classes = [permissions.IsAuthenticated]
+
+    pagination_class = LimitNumberPagePagination
 
     def get_queryset(self):
-        follower = self.request.user
-        return follower.follower.all()
+        recipes = Recipy.objects.all()
+        recipes_limit = get_recipes_limit(self.request)
+        if recipes_limit:
+            # Не больше recipes_limit последних рецептов каждого автора,
+            # ограничение применяется в самом запросе.
+            recipes = recipes.filter(id__in=Subquery(
+                Recipy.objects.filter(
+                    author_id=OuterRef('author_id')
+                ).values('id')[:recipes_limit]
+            ))
+        return (
+            self.request.user.follower
+            .select_related('author')
+            .prefetch_related(Prefetch(
+                'author__recipy',
+                queryset=recipes,
+                to_attr='limited_recipes'
+            ))
+            .order_by('-id')
+        )
 
 
-class IngredientViewSet(viewsets.ReadOnlyModelViewSet):
+class IngredientViewSet(ReplicaReadMixin, CachedResponseMixin,
+                        viewsets.ReadOnlyModelViewSet):
+    cache_namespace = 'ingredients'
+    replica_namespaces = ('ingredients',)
     queryset = Ingredient.objects.all()
     serializer_class = IngredientSerializer
     pagination_class = None
@@ -51,19 +98,174 @@ class IngredientViewSet(viewsets.ReadOnlyModelViewSet):
     filterset_class = IngredientFilter
 
 
-class TagViewSet(viewsets.ReadOnlyModelViewSet):
+class TagViewSet(ReplicaReadMixin, CachedResponseMixin,
+                 viewsets.ReadOnlyModelViewSet):
+    cache_namespace = 'tags'
+    replica_namespaces = ('tags',)
     queryset = Tag.objects.all()
     serializer_class = TagSerializer
     pagination_class = None
 
 
-class RecipyVeiwSet(viewsets.ModelViewSet):
+# Поля автора в ответе с рецептом, от которых зависит ETag.
+AUTHOR_FIELDS = ('email', 'username', 'first_name', 'last_name')
+
+
+class RecipyVeiwSet(ReplicaReadMixin, ConditionalResponseMixin,
+                    viewsets.ModelViewSet):
     queryset = Recipy.objects.all()
+    replica_namespaces = ('tags', 'ingredients')
     permission_classes = [AdminPermission | AuthorOrReadOnly]
     filter_backends = (DjangoFilterBackend,)
     filterset_class = RecipyFilter
     serializer_class = ReadRecipySerializer
 
+    @property
+    def pagination_class(self):
+        # Курсорная пагинация включается параметром ?pagination=cursor,
+        # ссылки на соседние страницы сохраняют его.
+        request = getattr(self, 'request', None)
+        if (request is not None
+                and request.query_params.get('pagination') == 'cursor'):
+            return RecipyCursorPagination
+        return LimitNumberPagePagination
+
+    def recipy_prefetches(self):
+        return (
+            'tags',
+            Prefetch(
+                'recipy',
+                queryset=IngredientsForRecipy.objects.select_related(
+                    'ingredient')
+            )
+        )
+
+    def get_queryset(self):
+        return (
+            Recipy.objects
+            .select_related('author')
+            .prefetch_related(*self.recipy_prefetches())
+            .with_user_flags(self.request.user)
+        )
+
+    def get_list_queryset(self):
+        # Теги и ингредиенты догружаются в prepare_rows, только если
+        # ответ не 304.
+        return self.get_queryset().prefetch_related(None)
+
+    def prepare_rows(self, rows):
+        prefetch_related_objects(rows, *self.recipy_prefetches())
+
+    def response_versions(self):
+        """
+        Версии данных, кроме самого рецепта и его автора, от которых
+        зависит ответ: теги, ингредиенты и избранное и корзина пользователя.
+        """
+        namespaces = ['tags', 'ingredients']
+        user = self.request.user
+        if user.is_authenticated:
+            namespaces += [f'favorites:{user.id}', f'basket:{user.id}']
+        return [self.request.accepted_renderer.format] + [
+            get_version(namespace) for namespace in namespaces
+        ]
+
+    def get_list_validators(self, rows):
+        """
+        ETag по уже прочитанной странице: id, времени изменения, признакам
+        и авторам рецептов, числу рецептов и ссылкам на соседние страницы.
+        Отдельных запросов к базе не требует.
+        """
+        paginator = self.paginator
+        # У курсорной пагинации страница — список, без общего числа.
+        page = getattr(paginator, 'page', None)
+        count = page.paginator.count if hasattr(page, 'paginator') else None
+        return make_etag([
+            self.request.get_full_path(),
+            [
+                (recipy.id, recipy.updated_at, recipy.is_favorited,
+                 recipy.is_in_shopping_cart,
+                 [getattr(recipy.author, field) for field in AUTHOR_FIELDS])
+                for recipy in rows
+            ],
+            count,
+            paginator and paginator.get_next_link(),
+            paginator and paginator.get_previous_link(),
+            *self.response_versions()
+        ]), None
+
+    def get_object_validators(self):
+        """
+        ETag по времени изменения рецепта, его автору и признакам избранного
+        и корзины. Last-Modified отдаётся только анонимным пользователям:
+        удаление из избранного не меняет времени изменения рецепта.
+        """
+        pk = str(self.kwargs.get(self.lookup_field, ''))
+        if not pk.isdigit():
+            return None
+        state = (
+            Recipy.objects
+            .with_user_flags(self.request.user)
+            .filter(pk=pk)
+            .values(
+                'updated_at', 'is_favorited', 'is_in_shopping_cart',
+                *(f'author__{field}' for field in AUTHOR_FIELDS)
+            )
+            .first()
+        )
+        if state is None:
+            return None
+        etag = make_etag([pk, state, *self.response_versions()])
+        if self.request.user.is_authenticated:
+            return etag, None
+        return etag, state['updated_at']
+
+    @action(detail=False)
+    def trending(self, request):
+        # Страница читается по индексу рейтинга по курсору, без COUNT(*)
+        # и OFFSET. Курсор хранит значение сортировки, а не путь к нему,
+        # поэтому очки переносятся в аннотацию.
+        recipes = (
+            self.filter_queryset(self.get_queryset())
+            .filter(trending__isnull=False)
+            .annotate(trending_score=F('trending__score'))
+        )
+        paginator = TrendingCursorPagination()
+        page = paginator.paginate_queryset(recipes, request, view=self)
+        serializer = self.get_serializer(page, many=True)
+        return paginator.get_paginated_response(serializer.data)
+
+    @action(detail=False, url_path='what_to_cook')
+    def what_to_cook(self, request):
+        """
+        Рецепты по ингредиентам из ?ingredients=1,2,3 по возрастанию
+        числа недостающих.
+        """
+        params = WhatToCookSerializer(data={
+            'ingredients': [
+                value for values in request.query_params.getlist(
+                    'ingredients'
+                ) for value in values.split(',') if value
+            ],
+            'limit': request.query_params.get('limit', 10),
+        })
+        params.is_valid(raise_exception=True)
+        found = recipy_matcher.match(
+            params.validated_data['ingredients'],
+            params.validated_data['limit']
+        )
+        recipes = Recipy.objects.in_bulk(
+            [recipy_id for recipy_id, _, _ in found]
+        )
+        results = []
+        for recipy_id, matched, missing in found:
+            recipy = recipes.get(recipy_id)
+            if recipy is not None:
+                recipy.matched, recipy.missing = matched, missing
+                results.append(recipy)
+        return Response(MatchedRecipySerializer(
+            results, many=True, context=self.get_serializer_context()
+        ).data)
+
     def create_ingredients_for_recipy(self, recipy, ingredients):
         recipy_list = []
         for ingredient in ingredients:
@@ -75,47 +277,114 @@ class RecipyVeiwSet(viewsets.ModelViewSet):
             recipy_list.append(ingredients_for_recipy)
         IngredientsForRecipy.objects.bulk_create(recipy_list)
 
-    def create(self, request, *args, **kwargs):
-        author = self.request.user
-        serializer = PostRecipySerializer(data=request.data)
-        if serializer.is_valid():
-            tags = serializer.validated_data.pop('tags')
-            ingredients = serializer.validated_data.pop('recipy')
-            recipy = Recipy.objects.create(
-                author=author,
-                **serializer.validated_data
+    def update_ingredients_for_recipy(self, recipy, ingredients):
+        """
+        Приводит ингредиенты рецепта к новому списку, изменяя только
+        добавленные, удалённые и строки с другим количеством.
+        """
+        current = {item.ingredient_id: item for item in recipy.recipy.all()}
+        amounts = {
+            ingredient['ingredient']['id']: ingredient['amount']
+            for ingredient in ingredients
+        }
+        removed = current.keys() - amounts.keys()
+        if removed:
+            IngredientsForRecipy.objects.filter(
+                recipy=recipy,
+                ingredient_id__in=removed
+            ).delete()
+        changed = []
+        for ingredient_id, item in current.items():
+            amount = amounts.get(ingredient_id, item.amount)
+            if amount != item.amount:
+                item.amount = amount
+                changed.append(item)
+        if changed:
+            IngredientsForRecipy.objects.bulk_update(changed, ['amount'])
+        added = amounts.keys() - current.keys()
+        if added:
+            IngredientsForRecipy.objects.bulk_create(
+                IngredientsForRecipy(
+                    recipy=recipy,
+                    ingredient_id=ingredient_id,
+                    amount=amounts[ingredient_id]
+                )
+                for ingredient_id in added
             )
-            recipy.tags.set(tags)
-            self.create_ingredients_for_recipy(recipy, ingredients)
 
-        context = {'request': self.request}
-        serializer = ReadRecipySerializer(instance=recipy, context=context)
-        return Response(
-            data=serializer.data,
-            status=HTTPStatus.CREATED
+    def create_tags(self, recipy, tags):
+        # Связь с тегами идёт через явную модель, для неё add() и set()
+        # лишний раз проверяют существующие строки, поэтому пишем сами.
+        RecipyTag.objects.bulk_create(
+            RecipyTag(recipy=recipy, tag=tag) for tag in tags
         )
 
-    def update(self, request, *args, **kwargs):
-        author = self.request.user
+    def update_tags(self, recipy, tags):
+        current = set(recipy.tags.all())
+        tags = set(tags)
+        if current - tags:
+            RecipyTag.objects.filter(
+                recipy=recipy,
+                tag__in=current - tags
+            ).delete()
+        if tags - current:
+            self.create_tags(recipy, tags - current)
+
+    def recipy_response(self, recipy, status):
+        recipy = self.get_queryset().get(pk=recipy.pk)
+        serializer = ReadRecipySerializer(
+            instance=recipy,
+            context=self.get_serializer_context()
+        )
+        return Response(data=serializer.data, status=status)
+
+    def recipy_changed(self, recipy):
+        # Ингредиенты и теги хранятся в других таблицах, время изменения
+        # рецепта обновляем явно.
+        Recipy.objects.filter(pk=recipy.pk).update(updated_at=timezone.now())
+        # Ингредиенты и теги меняются запросами, не отправляющими
+        # сигналы, поэтому версию рецептов увеличиваем здесь.
+        transaction.on_commit(lambda: bump_version('recipes', recipy.pk))
+
+    @transaction.atomic
+    def create(self, request, *args, **kwargs):
         serializer = PostRecipySerializer(data=request.data)
-        if serializer.is_valid():
-            tags = serializer.validated_data.pop('tags')
-            ingredients = serializer.validated_data.pop('recipy')
-            recipy = Recipy.objects.create(
-                author=author,
-                **serializer.validated_data
-            )
-            recipy = get_object_or_404(Recipy, id=self.kwargs.get('pk'))
-            IngredientsForRecipy.objects.filter(recipy=recipy).delete()
-            recipy.tags.set(tags)
-            self.create_ingredients_for_recipy(recipy, ingredients)
+        serializer.is_valid(raise_exception=True)
+        tags = serializer.validated_data.pop('tags')
+        ingredients = serializer.validated_data.pop('recipy')
+        recipy = Recipy.objects.create(
+            author=self.request.user,
+            **serializer.validated_data
+        )
+        self.create_tags(recipy, set(tags))
+        self.create_ingredients_for_recipy(recipy, ingredients)
+        schedule_renditions(recipy)
+        self.recipy_changed(recipy)
+        return self.recipy_response(recipy, HTTPStatus.CREATED)
 
-        context = {'request': self.request}
-        serializer = ReadRecipySerializer(instance=recipy, context=context)
-        return Response(
-            data=serializer.data,
-            status=HTTPStatus.CREATED
+    @transaction.atomic
+    def update(self, request, *args, **kwargs):
+        recipy = self.get_object()
+        serializer = PostRecipySerializer(
+            recipy,
+            data=request.data,
+            partial=kwargs.get('partial', False)
         )
+        serializer.is_valid(raise_exception=True)
+        tags = serializer.validated_data.pop('tags', None)
+        ingredients = serializer.validated_data.pop('recipy', None)
+        if serializer.validated_data:
+            for field, value in serializer.validated_data.items():
+                setattr(recipy, field, value)
+            recipy.save(update_fields=list(serializer.validated_data))
+        if 'image' in serializer.validated_data:
+            schedule_renditions(recipy)
+        if tags is not None:
+            self.update_tags(recipy, tags)
+        if ingredients is not None:
+            self.update_ingredients_for_recipy(recipy, ingredients)
+        self.recipy_changed(recipy)
+        return self.recipy_response(recipy, HTTPStatus.OK)
 
 
 class CreateDestroyViewSet(mixins.CreateModelMixin, mixins.DestroyModelMixin,
@@ -124,8 +393,10 @@ class CreateDestroyViewSet(mixins.CreateModelMixin, mixins.DestroyModelMixin,
     pass
 
 
-class SubscribeViewSet(CreateDestroyViewSet):
+class SubscribeViewSet(CoalescedWritesMixin, CreateDestroyViewSet):
     serializer_class = SubscribeSerializer
+    throttle_classes = (TokenBucketThrottle,)
+    throttle_scope = 'subscribe'
 
     def get_queryset(self):
         user = self.request.user
@@ -149,10 +420,18 @@ class SubscribeViewSet(CreateDestroyViewSet):
                 status=HTTPStatus.BAD_REQUEST
             )
 
-        follow = Follow.objects.create(
-            user=self.request.user,
-            author=author
-        )
+        try:
+            with transaction.atomic():
+                follow = Follow.objects.create(
+                    user=self.request.user,
+                    author=author
+                )
+        except IntegrityError:
+            # Такой же запрос успел выполниться в другом процессе.
+            return Response(
+                'Вы уже подписаны на этого автора!',
+                status=HTTPStatus.BAD_REQUEST
+            )
         serializer = FollowSerializer(
             follow,
             context={'request': request}
@@ -175,22 +454,54 @@ class SubscribeViewSet(CreateDestroyViewSet):
         return Response(status=HTTPStatus.NO_CONTENT)
 
 
-class FavoriteViewSet(CreateDestroyViewSet):
-    serializer_class = FavoriteSerializer
-
-    def get_queryset(self):
-        user = self.request.user
-        return user.favorite.all()
-
+class RecipyRelationViewSet(CoalescedWritesMixin, CreateDestroyViewSet):
+    """
+    Добавление рецептов в избранное или корзину и удаление из них, по
+    одному и списком. В relation_model указывается модель связи, в
+    counter_field — счётчик рецепта, в exists_message — ответ на
+    повторное добавление.
+    """
+    relation_model = None
+    counter_field = None
+    exists_message = None
+    throttle_classes = (TokenBucketThrottle,)
+
+    def relation_changed(self, user):
+        """Вызывается после фиксации изменений связей пользователя."""
+
+    def lock_user(self, user):
+        """
+        Блокирует строку пользователя до конца транзакции: связи одного
+        пользователя добавляются по очереди, и каждый запрос видит
+        добавленные предыдущими.
+        """
+        User.objects.select_for_update().filter(pk=user.pk).first()
+
+    @transaction.atomic
     def create(self, request, *args, **kwargs):
         recipy = get_object_or_404(
             Recipy,
             id=self.kwargs.get('recipe_id')
         )
-        Favorite.objects.create(
-            user=request.user,
-            recipy=recipy
-        )
+        self.lock_user(request.user)
+        if self.relation_model.objects.filter(user=request.user,
+                                              recipy=recipy).exists():
+            return Response(
+                self.exists_message,
+                status=HTTPStatus.BAD_REQUEST
+            )
+        try:
+            with transaction.atomic():
+                self.relation_model.objects.create(
+                    user=request.user,
+                    recipy=recipy
+                )
+        except IntegrityError:
+            # Связь успели добавить в обход API, например в админке.
+            return Response(
+                self.exists_message,
+                status=HTTPStatus.BAD_REQUEST
+            )
         serializer = BriefRecipySerializer(
             recipy,
             many=False
@@ -206,79 +517,218 @@ class FavoriteViewSet(CreateDestroyViewSet):
             id=self.kwargs.get('recipe_id')
         )
         get_object_or_404(
-            Favorite,
+            self.relation_model,
             user=request.user,
             recipy=recipy
         ).delete()
         return Response(status=HTTPStatus.NO_CONTENT)
 
+    def get_recipy_ids(self, request):
+        serializer = BulkRecipesSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        return list(dict.fromkeys(serializer.validated_data['recipes']))
+
+    def related_recipy_ids(self, user, recipy_ids):
+        return set(
+            self.relation_model.objects
+            .filter(user=user, recipy_id__in=recipy_ids)
+            .values_list('recipy_id', flat=True)
+        )
+
+    def insert_relations(self, user, recipy_ids):
+        """
+        Добавляет связи с рецептами, которых ещё нет. Возвращает id уже
+        связанных рецептов и id добавленных этим запросом.
+        """
+        self.lock_user(user)
+        existing = self.related_recipy_ids(user, recipy_ids)
+        self.relation_model.objects.bulk_create(
+            (self.relation_model(user=user, recipy_id=recipy_id)
+             for recipy_id in recipy_ids),
+            ignore_conflicts=True
+        )
+        created = self.related_recipy_ids(user, recipy_ids) - existing
+        return existing, created
+
+    @transaction.atomic
+    def bulk_create(self, request, *args, **kwargs):
+        """
+        Добавляет рецепты из списка за постоянное число запросов. Для
+        каждого id возвращает created, exists или not_found.
+        """
+        recipy_ids = self.get_recipy_ids(request)
+        found = set(
+            Recipy.objects.filter(pk__in=recipy_ids)
+            .values_list('pk', flat=True)
+        )
+        existing, created = self.insert_relations(
+            request.user, [
+                recipy_id for recipy_id in recipy_ids if recipy_id in found
+            ]
+        )
+        # bulk_create не отправляет сигналы, счётчики и кэш обновляем сами.
+        change_counters(Recipy, created, self.counter_field, 1)
+        transaction.on_commit(lambda: self.relation_changed(request.user))
+        statuses = {recipy_id: 'created' for recipy_id in created}
+        statuses.update({recipy_id: 'exists' for recipy_id in existing})
+        return Response({'results': [
+            {'id': recipy_id, 'status': statuses.get(recipy_id, 'not_found')}
+            for recipy_id in recipy_ids
+        ]})
+
+    @transaction.atomic
+    def bulk_delete(self, request, *args, **kwargs):
+        """
+        Удаляет рецепты из списка. Для каждого id возвращает deleted или
+        not_found. Счётчики и кэш обновляют сигналы удаления.
+        """
+        recipy_ids = self.get_recipy_ids(request)
+        # Блокировка строк: параллельный запрос дождётся удаления и не
+        # удалит те же связи ещё раз.
+        relations = dict(
+            self.relation_model.objects.select_for_update()
+            .filter(user=request.user, recipy_id__in=recipy_ids)
+            .values_list('pk', 'recipy_id')
+        )
+        self.relation_model.objects.filter(pk__in=relations).delete()
+        deleted = set(relations.values())
+        return Response({'results': [
+            {'id': recipy_id,
+             'status': 'deleted' if recipy_id in deleted else 'not_found'}
+            for recipy_id in recipy_ids
+        ]})
 
-class ShoppingCartViewSet(CreateDestroyViewSet):
+
+class FavoriteViewSet(RecipyRelationViewSet):
+    serializer_class = FavoriteSerializer
+    relation_model = Favorite
+    counter_field = 'favorites_count'
+    exists_message = 'Рецепт уже в избранном!'
+    throttle_scope = 'favorite'
+
+    def relation_changed(self, user):
+        bump_version(f'favorites:{user.id}')
+
+    def get_queryset(self):
+        user = self.request.user
+        return user.favorite.all()
+
+
+class ShoppingCartViewSet(RecipyRelationViewSet):
     serializer_class = ShoppingCart
+    relation_model = Basket
+    counter_field = 'in_baskets_count'
+    exists_message = 'Рецепт уже в корзине!'
+    throttle_scope = 'shopping_cart'
 
     def get_queryset(self):
         user = self.request.user
         return user.recipy_in_basket.all()
 
-    def create(self, request, *args, **kwargs):
-        recipy = get_object_or_404(
-            Recipy,
-            id=self.kwargs.get('recipe_id')
-        )
-        Basket.objects.create(
-            user=request.user,
-            recipy=recipy
-        )
-        serializer = BriefRecipySerializer(
-            recipy,
-            many=False
-        )
-        return Response(
-            data=serializer.data,
-            status=HTTPStatus.CREATED
-        )
+    def relation_changed(self, user):
+        bump_version(f'basket:{user.id}')
 
-    def delete(self, request, *args, **kwargs):
-        recipy = get_object_or_404(
-            Recipy,
-            id=self.kwargs.get('recipe_id')
-        )
-        get_object_or_404(
-            Basket,
-            user=request.user,
-            recipy=recipy
-        ).delete()
-        return Response(status=HTTPStatus.NO_CONTENT)
 
+class MealPlanViewSet(viewsets.ModelViewSet):
+    """
+    План питания пользователя. Параметры ?start= и ?end= ограничивают
+    список периодом.
+    """
+    serializer_class = MealPlanEntrySerializer
+    permission_classes = (permissions.IsAuthenticated,)
 
-@api_view()
-def download_shopping_cart(request):
-    baskets = Basket.objects.filter(user=request.user)
-    cart_list = {}
-    for basket in baskets:
-        for ingredient in basket.recipy.ingredients.all():
-            amount = get_object_or_404(
-                IngredientsForRecipy,
-                recipy=basket.recipy,
-                ingredient=ingredient
-            ).amount
-            if ingredient.name not in cart_list:
-                cart_list[ingredient.name] = amount
-            else:
-                cart_list[ingredient.name] += amount
-
-    content = 'Список покупок:\n\n'
-    if not cart_list:
-        content += 'Корзина пуста!'
-    for item in cart_list:
-        measurement_unit = get_object_or_404(
-            Ingredient,
-            name=item
-        ).measurement_unit
-        content += f'{item}: {cart_list[item]} {measurement_unit}\n'
-
-    response = HttpResponse(
-        content, content_type='text/plain,charset=utf8'
-    )
-    response['Content-Disposition'] = 'attachment; filename="grocery_list.txt"'
-    return response
+    def get_queryset(self):
+        queryset = self.request.user.meal_plan.select_related('recipy')
+        params = self.request.query_params
+        if self.action != 'list' or not ('start' in params or 'end' in params):
+            return queryset
+        period = MealPlanPeriodSerializer(data=params)
+        period.is_valid(raise_exception=True)
+        return queryset.filter(date__range=(
+            period.validated_data['start'],
+            period.validated_data['end']
+        ))
+
+    def perform_create(self, serializer):
+        serializer.save(user=self.request.user)
+
+
+def export_response(request, respond):
+    """
+    Аутентифицирует запрос средствами DRF, выбирает формат и готовит
+    файл функцией respond(request, export, user).
+    """
+    drf_request = Request(request, authenticators=[
+        authentication() for authentication
+        in api_settings.DEFAULT_AUTHENTICATION_CLASSES
+    ])
+    try:
+        user = drf_request.user
+    except AuthenticationFailed as error:
+        return JsonResponse(
+            {'detail': error.detail}, status=HTTPStatus.UNAUTHORIZED
+        )
+    if not user.is_authenticated:
+        return JsonResponse(
+            {'detail': NotAuthenticated.default_detail},
+            status=HTTPStatus.UNAUTHORIZED
+        )
+    export = choose_exporter(request)
+    if export is None:
+        return JsonResponse(
+            {'detail': 'Формат не поддерживается. Доступны: '
+                       f'{", ".join(EXPORTERS)}.'},
+            status=HTTPStatus.NOT_ACCEPTABLE
+        )
+    return respond(request, export, user)
+
+
+def export_response_in_thread(request, respond):
+    try:
+        response = export_response(request, respond)
+        if response.streaming:
+            response = read_whole(response)
+        return response
+    finally:
+        # У каждого потока своё соединение с базой, не оставляем его.
+        connection.close()
+
+
+async def async_export_response(request, respond):
+    """
+    Под ASGI синхронные представления Django выполняются по очереди в
+    одном общем потоке, поэтому запрос к базе и сборка файла уходят в
+    отдельный поток и не задерживают остальные запросы.
+    """
+    if request.method != 'GET':
+        return HttpResponseNotAllowed(['GET'])
+    if isinstance(request, ASGIRequest):
+        return await sync_to_async(
+            export_response_in_thread, thread_sensitive=False
+        )(request, respond)
+    # Под WSGI представление и так выполняется в потоке запроса.
+    return await sync_to_async(export_response)(request, respond)
+
+
+def shopping_cart_file(request, export, user):
+    return shopping_list_response(export, user)
+
+
+def meal_plan_file(request, export, user):
+    period = MealPlanPeriodSerializer(data=request.GET)
+    if not period.is_valid():
+        return JsonResponse(period.errors, status=HTTPStatus.BAD_REQUEST)
+    return meal_plan_response(export, user, **period.validated_data)
+
+
+async def download_shopping_cart(request):
+    """Список покупок по корзине, асинхронное представление."""
+    return await async_export_response(request, shopping_cart_file)
+
+
+async def download_meal_plan(request):
+    """
+    Список покупок по плану питания на период ?start= — ?end=,
+    асинхронное представление.
+    """
+    return await async_export_response(request, meal_plan_file)
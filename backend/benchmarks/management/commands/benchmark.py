@@ -0,0 +1,103 @@
+import json
+
+from benchmarks.scenarios import SCENARIOS
+from django.core.management.base import BaseCommand, CommandError
+
+# Показатели, которые сравниваются с сохранёнными результатами.
+COMPARED = ('p50_ms', 'p95_ms', 'p99_ms', 'queries')
+
+# Разница во времени меньше этой (мс) считается шумом измерений.
+MIN_DELTA_MS = 2
+
+
+class Command(BaseCommand):
+    help = 'Замеряет время ответа и число запросов к базе по сценариям.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'scenarios', nargs='*',
+            help=f'Сценарии: {", ".join(SCENARIOS)}. По умолчанию все.'
+        )
+        parser.add_argument('--repeat', type=int, default=20)
+        parser.add_argument(
+            '--recipes', type=int,
+            help='Число рецептов для сценариев с большой лентой.'
+        )
+        parser.add_argument(
+            '--url',
+            help='Адрес запущенного сервера для сценария load.'
+        )
+        parser.add_argument('--token', help='Токен для сценария load.')
+        parser.add_argument(
+            '--concurrency', type=int, default=16,
+            help='Число параллельных клиентов в сценарии load.'
+        )
+        parser.add_argument(
+            '--save', metavar='PATH',
+            help='Сохранить результаты в JSON как базовые.'
+        )
+        parser.add_argument(
+            '--baseline', metavar='PATH',
+            help='Сравнить результаты с сохранёнными в JSON.'
+        )
+        parser.add_argument(
+            '--tolerance', type=float, default=0.2,
+            help='Допустимый рост времени ответа относительно базового.'
+        )
+
+    def handle(self, *args, **options):
+        names = options['scenarios'] or list(SCENARIOS)
+        unknown = set(names) - set(SCENARIOS)
+        if unknown:
+            raise CommandError(
+                f'Неизвестные сценарии: {", ".join(sorted(unknown))}'
+            )
+        baseline = {}
+        if options['baseline']:
+            with open(options['baseline'], encoding='utf-8') as file:
+                baseline = json.load(file)
+
+        results = {}
+        regressions = []
+        for name in names:
+            self.stdout.write(self.style.MIGRATE_HEADING(name))
+            results[name] = {}
+            for row in SCENARIOS[name](options):
+                case = row.pop('case')
+                results[name][case] = row
+                self.stdout.write(
+                    '  {case:<24} p50={p50_ms}ms p95={p95_ms}ms '
+                    'p99={p99_ms}ms max={max_ms}ms '
+                    'queries={queries}'.format(case=case, **row)
+                    + (f' rps={row["rps"]}' if 'rps' in row else '')
+                )
+                expected = baseline.get(name, {}).get(case)
+                if expected:
+                    regressions.extend(
+                        f'{name} / {case}: {line}'
+                        for line in self.compare(row, expected, options)
+                    )
+
+        if options['save']:
+            with open(options['save'], 'w', encoding='utf-8') as file:
+                json.dump(results, file, ensure_ascii=False, indent=2)
+        if regressions:
+            for line in regressions:
+                self.stderr.write(line)
+            raise CommandError(
+                f'Хуже базовых результатов: {len(regressions)}.'
+            )
+
+    def compare(self, row, expected, options):
+        for metric in COMPARED:
+            if metric not in expected:
+                continue
+            if metric == 'queries':
+                limit = expected[metric]
+            else:
+                limit = max(
+                    expected[metric] * (1 + options['tolerance']),
+                    expected[metric] + MIN_DELTA_MS
+                )
+            if row[metric] > limit:
+                yield f'{metric} {row[metric]} > {expected[metric]}'
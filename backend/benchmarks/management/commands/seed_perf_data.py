@@ -0,0 +1,49 @@
+import time
+
+from benchmarks.scenarios import seed
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+
+class Command(BaseCommand):
+    help = ('Создаёт синтетические данные для нагрузочных замеров: '
+            'пользователей, рецепты, избранное, корзины и подписки.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=100)
+        parser.add_argument('--recipes', type=int, default=1000)
+        parser.add_argument(
+            '--ingredients-per-recipe', type=int, default=8,
+            dest='per_recipy'
+        )
+        parser.add_argument(
+            '--favorites', type=int, default=20,
+            help='Избранных рецептов у каждого пользователя.'
+        )
+        parser.add_argument(
+            '--baskets', type=int, default=10,
+            help='Рецептов в корзине у каждого пользователя.'
+        )
+        parser.add_argument(
+            '--follows', type=int, default=10,
+            help='Подписок у каждого пользователя.'
+        )
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--batch-size', type=int, default=5000)
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        with transaction.atomic():
+            seed(
+                users=options['users'],
+                recipes=options['recipes'],
+                per_recipy=options['per_recipy'],
+                favorites=options['favorites'],
+                baskets=options['baskets'],
+                follows=options['follows'],
+                seed=options['seed'],
+                batch_size=options['batch_size'],
+            )
+        self.stdout.write(self.style.SUCCESS(
+            f'Данные созданы за {time.perf_counter() - started:.1f} с.'
+        ))
@@ -0,0 +1,856 @@
+"""
+Сценарии замеров производительности для `manage.py benchmark`.
+
+Каждый сценарий создаёт свои данные внутри транзакции, которая
+откатывается после замера, поэтому его можно запускать на рабочей базе.
+Сценарий api работает с данными, созданными `manage.py seed_perf_data`.
+"""
+import datetime
+import itertools
+import random
+import shutil
+import tempfile
+import time
+from base64 import b64encode
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import ExitStack, contextmanager
+from unittest.mock import patch
+from urllib.parse import urlencode
+from urllib.request import Request as UrlRequest
+from urllib.request import urlopen
+
+from api.authentication import token_cache
+from api.cache import bump_version
+from api.profiling import percentile
+from api.search import IngredientIndex
+from api.throttling import TokenBucketThrottle
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import CommandError
+from django.db import connection, transaction
+from django.db.models import Count, F, Q
+from django.test.utils import CaptureQueriesContext, override_settings
+from recipys.counters import reconcile_all
+from recipys.models import (Basket, Favorite, Ingredient, IngredientsForRecipy,
+                            MealPlanEntry, Recipy, Tag, TrendingRecipy)
+from recipys.trending import refresh_trending
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+from users.models import Follow, User
+
+SCENARIOS = {}
+
+# Префикс имён пользователей и рецептов, созданных seed_perf_data.
+SEED_PREFIX = 'perf_'
+
+# Прозрачная картинка 1x1 для запросов на создание рецептов.
+BENCHMARK_IMAGE = (
+    'data:image/png;base64,iVBORw0KGgoAAAANSUhEUgAAAAEAAAABCAYAAAAfFcSJ'
+    'AAAADUlEQVR42mNkYPhfDwAChwGA60e6kgAAAABJRU5ErkJggg=='
+)
+
+
+def scenario(name):
+    """Регистрирует функцию как сценарий с указанным именем."""
+    def decorator(func):
+        SCENARIOS[name] = func
+        return func
+    return decorator
+
+
+@contextmanager
+def sandbox():
+    """
+    Откатывает все изменения в базе, сделанные внутри блока, и удаляет
+    загруженные за это время файлы. Ограничение частоты запросов внутри
+    блока отключено, иначе замеры упрутся в него.
+    """
+    media_root = tempfile.mkdtemp()
+    try:
+        with ExitStack() as stack:
+            stack.enter_context(override_settings(MEDIA_ROOT=media_root))
+            stack.enter_context(patch.object(
+                TokenBucketThrottle, 'allow_request', return_value=True
+            ))
+            stack.enter_context(transaction.atomic())
+            yield
+            transaction.set_rollback(True)
+    finally:
+        shutil.rmtree(media_root, ignore_errors=True)
+
+
+def summarize(timings, queries):
+    return {
+        'p50_ms': round(percentile(timings, 50), 2),
+        'p95_ms': round(percentile(timings, 95), 2),
+        'p99_ms': round(percentile(timings, 99), 2),
+        'max_ms': round(max(timings), 2),
+        'queries': queries,
+    }
+
+
+def measure(func, repeat):
+    """Время выполнения (мс) и число запросов к базе за один вызов."""
+    timings = []
+    for _ in range(repeat):
+        with CaptureQueriesContext(connection) as context:
+            started = time.perf_counter()
+            func()
+            timings.append((time.perf_counter() - started) * 1000)
+    return summarize(timings, len(context.captured_queries))
+
+
+def create_user(username):
+    return User.objects.create(
+        username=username,
+        email=f'{username}@example.com',
+        first_name=username,
+        last_name=username,
+        is_superuser=False
+    )
+
+
+def create_ingredients(count, prefix='ингредиент'):
+    Ingredient.objects.bulk_create(
+        Ingredient(name=f'{prefix} {number}', measurement_unit='г')
+        for number in range(count)
+    )
+    return list(
+        Ingredient.objects.filter(name__startswith=prefix)
+        .values_list('id', flat=True)
+    )
+
+
+def create_recipes(author, count, ingredient_ids, per_recipy):
+    """Создаёт рецепты по `per_recipy` ингредиентов в каждом."""
+    recipes = [
+        Recipy.objects.create(
+            author=author,
+            name=f'рецепт {number}',
+            text='описание',
+            image='recipes/benchmark.png',
+            cooking_time=10
+        )
+        for number in range(count)
+    ]
+    IngredientsForRecipy.objects.bulk_create(
+        IngredientsForRecipy(
+            recipy=recipy,
+            ingredient_id=ingredient_ids[
+                (number + shift) % len(ingredient_ids)
+            ],
+            amount=shift + 1
+        )
+        for number, recipy in enumerate(recipes)
+        for shift in range(per_recipy)
+    )
+    return recipes
+
+
+def download_shopping_cart(client, user):
+    """
+    Скачивает список покупок, каждый раз собирая его в базе: версия
+    корзины увеличивается, и файл из кэша не подходит.
+    """
+    bump_version(f'basket:{user.id}')
+    response = client.get('/api/recipes/download_shopping_cart/')
+    if response.streaming:
+        return b''.join(response.streaming_content)
+    return response.content
+
+
+@scenario('shopping_cart')
+def shopping_cart(options):
+    """Скачивание списка покупок при разном размере корзины."""
+    results = []
+    for cart_size in (1, 5, 20, 50, 100):
+        with sandbox():
+            user = create_user('benchmark')
+            ingredient_ids = create_ingredients(200)
+            recipes = create_recipes(user, cart_size, ingredient_ids, 10)
+            Basket.objects.bulk_create(
+                Basket(user=user, recipy=recipy) for recipy in recipes
+            )
+            client = APIClient()
+            client.force_authenticate(user)
+
+            stats = measure(
+                lambda: download_shopping_cart(client, user),
+                options['repeat']
+            )
+        results.append({'case': f'в корзине {cart_size}', **stats})
+    return results
+
+
+@scenario('recipes')
+def recipes(options):
+    """Список рецептов разного размера страницы и один рецепт."""
+    results = []
+    with sandbox():
+        user = create_user('benchmark')
+        ingredient_ids = create_ingredients(50)
+        recipes = create_recipes(user, 50, ingredient_ids, 8)
+        client = APIClient()
+        client.force_authenticate(user)
+        for limit in (6, 20, 50):
+            stats = measure(
+                lambda: client.get(f'/api/recipes/?limit={limit}'),
+                options['repeat']
+            )
+            results.append({'case': f'список, limit={limit}', **stats})
+        stats = measure(
+            lambda: client.get(f'/api/recipes/{recipes[0].id}/'),
+            options['repeat']
+        )
+        results.append({'case': 'один рецепт', **stats})
+    return results
+
+
+@scenario('subscriptions')
+def subscriptions(options):
+    """Лента подписок при разном числе авторов на странице."""
+    results = []
+    with sandbox():
+        user = create_user('benchmark')
+        ingredient_ids = create_ingredients(20)
+        for number in range(50):
+            author = create_user(f'author{number}')
+            create_recipes(author, 5, ingredient_ids, 1)
+            Follow.objects.create(user=user, author=author)
+        client = APIClient()
+        client.force_authenticate(user)
+        for limit in (6, 20, 50):
+            stats = measure(
+                lambda: client.get(
+                    f'/api/users/subscriptions/?limit={limit}'
+                    '&recipes_limit=3'
+                ),
+                options['repeat']
+            )
+            results.append({'case': f'авторов на странице {limit}', **stats})
+    return results
+
+
+def random_names(count, seed=0):
+    """Уникальные псевдослучайные названия из русских слогов."""
+    syllables = [
+        'ма', 'ка', 'ро', 'ни', 'со', 'ль', 'сы', 'ры', 'мо', 'ло', 'ко',
+        'ва', 'ре', 'нье', 'пе', 'рец', 'лу', 'ку', 'са', 'хар', 'ми', 'нд',
+    ]
+    generator = random.Random(seed)
+    names = set()
+    while len(names) < count:
+        names.add(' '.join(
+            ''.join(generator.choices(syllables, k=generator.randint(2, 4)))
+            for _ in range(generator.randint(1, 3))
+        ))
+    return sorted(names)
+
+
+@scenario('ingredient_search')
+def ingredient_search(options):
+    """Поиск по началу названия: ORM-фильтр против индекса в памяти."""
+    results = []
+    for size in (2000, 200000):
+        with sandbox():
+            names = random_names(size)
+            # Совпавшие с уже загруженными ингредиенты пропускаются.
+            Ingredient.objects.bulk_create(
+                (Ingredient(name=name, measurement_unit='г')
+                 for name in names),
+                batch_size=1000,
+                ignore_conflicts=True
+            )
+            bump_version('ingredients')
+            # Запросы по началу названий, по подстроке и с опечаткой.
+            sample = names[::size // 20]
+            queries = (
+                [name[:length] for name in sample for length in (2, 4, 6)]
+                + [name[2:6] for name in sample]
+                + [name[:3] + 'ъ' + name[4:7] for name in sample]
+            )
+            index = IngredientIndex()
+            started = time.perf_counter()
+            index.refresh()
+            build_ms = round((time.perf_counter() - started) * 1000, 2)
+            results.append({
+                'case': f'{size}: построение индекса',
+                'p50_ms': build_ms, 'p95_ms': build_ms, 'p99_ms': build_ms,
+                'max_ms': build_ms, 'queries': 1,
+            })
+            stats = measure(
+                lambda: [list(Ingredient.objects.filter(
+                    name__istartswith=query
+                )) for query in queries],
+                options['repeat']
+            )
+            results.append({'case': f'{size}: ORM istartswith', **stats})
+            stats = measure(
+                lambda: [index.search(query, 50) for query in queries],
+                options['repeat']
+            )
+            results.append({'case': f'{size}: индекс', **stats})
+    return results
+
+
+@scenario('recipe_write')
+def recipe_write(options):
+    """Создание рецепта и изменение части его ингредиентов и тегов."""
+    results = []
+    with sandbox():
+        user = create_user('benchmark')
+        ingredient_ids = create_ingredients(30)
+        tags = [
+            Tag.objects.create(name=f'тег {number}', slug=f'tag{number}')
+            for number in range(4)
+        ]
+        client = APIClient()
+        client.force_authenticate(user)
+        payload = {
+            'name': 'рецепт',
+            'text': 'описание',
+            'cooking_time': 10,
+            'image': BENCHMARK_IMAGE,
+            'tags': [tag.id for tag in tags[:2]],
+            'ingredients': [
+                {'id': ingredient_id, 'amount': 1}
+                for ingredient_id in ingredient_ids[:10]
+            ],
+        }
+        stats = measure(
+            lambda: client.post('/api/recipes/', payload, format='json'),
+            options['repeat']
+        )
+        results.append({'case': 'создание', **stats})
+        recipy_id = Recipy.objects.latest('id').id
+        changed = {
+            'tags': [tag.id for tag in tags[1:3]],
+            'ingredients': [
+                {'id': ingredient_id, 'amount': 2}
+                for ingredient_id in ingredient_ids[5:15]
+            ],
+        }
+        stats = measure(
+            lambda: client.patch(
+                f'/api/recipes/{recipy_id}/', changed, format='json'
+            ),
+            options['repeat']
+        )
+        results.append({'case': 'изменение', **stats})
+    return results
+
+
+def encode_cursor(position):
+    """Курсор в формате CursorPagination, указывающий на позицию в ленте."""
+    querystring = urlencode({'p': position})
+    return b64encode(querystring.encode('ascii')).decode('ascii')
+
+
+@scenario('feed_pagination')
+def feed_pagination(options):
+    """Дальние страницы ленты: номер страницы против курсора."""
+    results = []
+    size = options['recipes'] or 100000
+    with sandbox():
+        user = create_user('benchmark')
+        for start in range(0, size, 10000):
+            Recipy.objects.bulk_create(
+                Recipy(
+                    author=user,
+                    name=f'рецепт {number}',
+                    text='описание',
+                    image='recipes/benchmark.png',
+                    cooking_time=10
+                )
+                for number in range(start, min(start + 10000, size))
+            )
+        client = APIClient()
+        client.force_authenticate(user)
+        for depth in (0, size // 2, size - 6):
+            page = depth // 6 + 1
+            stats = measure(
+                lambda: client.get(f'/api/recipes/?page={page}'),
+                options['repeat']
+            )
+            results.append({'case': f'страница {page}', **stats})
+            position = Recipy.objects.values_list(
+                'pub_date', flat=True
+            )[depth]
+            cursor = encode_cursor(str(position))
+            stats = measure(
+                lambda: client.get(
+                    f'/api/recipes/?pagination=cursor&cursor={cursor}'
+                ),
+                options['repeat']
+            )
+            results.append({'case': f'курсор на {depth}', **stats})
+    return results
+
+
+def seed(users, recipes, per_recipy, favorites, baskets, follows,
+         seed=0, batch_size=5000):
+    """
+    Массово создаёт пользователей, рецепты с ингредиентами и тегами,
+    избранное, корзины и подписки. Повторный запуск добавляет данные.
+    """
+    generator = random.Random(seed)
+    first = User.objects.filter(username__startswith=SEED_PREFIX).count()
+    password = make_password(None)
+    User.objects.bulk_create(
+        (User(
+            username=f'{SEED_PREFIX}{number}',
+            email=f'{SEED_PREFIX}{number}@example.com',
+            first_name='Perf',
+            last_name=str(number),
+            password=password,
+            is_superuser=False
+        ) for number in range(first, first + users)),
+        batch_size=batch_size
+    )
+    user_ids = list(
+        User.objects.filter(username__startswith=SEED_PREFIX)
+        .values_list('id', flat=True)
+    )
+
+    if not Ingredient.objects.exists():
+        Ingredient.objects.bulk_create(
+            (Ingredient(name=name, measurement_unit='г')
+             for name in random_names(2000, seed)),
+            batch_size=batch_size
+        )
+        bump_version('ingredients')
+    ingredient_ids = list(Ingredient.objects.values_list('id', flat=True))
+    Tag.objects.bulk_create(
+        (Tag(name=f'{SEED_PREFIX}{number}', slug=f'{SEED_PREFIX}{number}')
+         for number in range(3)),
+        ignore_conflicts=True
+    )
+    bump_version('tags')
+    tag_ids = list(Tag.objects.values_list('id', flat=True))
+
+    first = Recipy.objects.filter(name__startswith=SEED_PREFIX).count()
+    Recipy.objects.bulk_create(
+        (Recipy(
+            author_id=generator.choice(user_ids),
+            name=f'{SEED_PREFIX}{number}',
+            text='описание',
+            image='recipes/benchmark.png',
+            cooking_time=generator.randint(5, 120)
+        ) for number in range(first, first + recipes)),
+        batch_size=batch_size
+    )
+    new_recipes = list(
+        Recipy.objects.filter(name__startswith=SEED_PREFIX)
+        .order_by('id').values_list('id', flat=True)[first:]
+    )
+    IngredientsForRecipy.objects.bulk_create(
+        (IngredientsForRecipy(
+            recipy_id=recipy_id,
+            ingredient_id=ingredient_id,
+            amount=generator.randint(1, 500)
+        ) for recipy_id in new_recipes
+            for ingredient_id in generator.sample(ingredient_ids, per_recipy)),
+        batch_size=batch_size
+    )
+    Recipy.tags.through.objects.bulk_create(
+        (Recipy.tags.through(recipy_id=recipy_id, tag_id=tag_id)
+         for recipy_id in new_recipes
+         for tag_id in generator.sample(tag_ids, generator.randint(1, 2))),
+        batch_size=batch_size
+    )
+
+    recipy_ids = list(Recipy.objects.values_list('id', flat=True))
+    for model, count in ((Favorite, favorites), (Basket, baskets)):
+        model.objects.bulk_create(
+            (model(user_id=user_id, recipy_id=recipy_id)
+             for user_id in user_ids
+             for recipy_id in generator.sample(
+                 recipy_ids, min(count, len(recipy_ids)))),
+            batch_size=batch_size,
+            ignore_conflicts=True
+        )
+    Follow.objects.bulk_create(
+        (Follow(user_id=user_id, author_id=author_id)
+         for user_id in user_ids
+         for author_id in generator.sample(
+             user_ids, min(follows, len(user_ids)))
+         if author_id != user_id),
+        batch_size=batch_size,
+        ignore_conflicts=True
+    )
+    # bulk_create не отправляет сигналы, счётчики пересчитываются отдельно.
+    reconcile_all()
+    bump_version('recipes')
+
+
+@scenario('trending')
+def trending(options):
+    """Пересчёт рейтинга популярных рецептов и чтение его страниц."""
+    results = []
+    with sandbox():
+        seed(users=200, recipes=options['recipes'] or 5000, per_recipy=1,
+             favorites=50, baskets=20, follows=0)
+        stats = measure(lambda: refresh_trending(full=True), 1)
+        results.append({'case': 'полный пересчёт', **stats})
+        stats = measure(refresh_trending, options['repeat'])
+        results.append({'case': 'дополнение без новых событий', **stats})
+        client = APIClient()
+        # Курсор на середину рейтинга: дальняя страница стоит как первая.
+        middle = TrendingRecipy.objects.order_by('-score', '-recipy')[
+            TrendingRecipy.objects.count() // 2
+        ]
+        for case, url in (
+            ('первая страница', '/api/recipes/trending/'),
+            ('середина рейтинга', '/api/recipes/trending/?cursor='
+             + encode_cursor(str(middle.score))),
+        ):
+            stats = measure(lambda: client.get(url), options['repeat'])
+            results.append({'case': case, **stats})
+    return results
+
+
+@scenario('recipe_search')
+def recipe_search(options):
+    """Поиск рецептов через ?search= рядом с обычной лентой."""
+    results = []
+    with sandbox():
+        seed(users=50, recipes=options['recipes'] or 20000, per_recipy=5,
+             favorites=0, baskets=0, follows=0)
+        client = APIClient()
+        stats = measure(lambda: client.get('/api/recipes/?search=perf'), 1)
+        results.append({'case': 'первый поиск', **stats})
+        stats = measure(lambda: client.get('/api/recipes/'), options['repeat'])
+        results.append({'case': 'лента без поиска', **stats})
+        for query in ('perf_1', 'описание'):
+            stats = measure(
+                lambda: client.get(f'/api/recipes/?search={query}'),
+                options['repeat']
+            )
+            results.append({'case': f'search={query}', **stats})
+    return results
+
+
+@scenario('what_to_cook')
+def what_to_cook(options):
+    """
+    Подбор рецептов по ингредиентам: индекс в памяти против подсчёта
+    совпадений в базе.
+    """
+    results = []
+    with sandbox():
+        seed(users=100, recipes=options['recipes'] or 100000, per_recipy=8,
+             favorites=0, baskets=0, follows=0)
+        generator = random.Random(0)
+        ingredient_ids = generator.sample(
+            list(Ingredient.objects.values_list('id', flat=True)), 15
+        )
+        client = APIClient()
+        for count in (5, 15):
+            query = ','.join(map(str, ingredient_ids[:count]))
+            url = f'/api/recipes/what_to_cook/?ingredients={query}'
+            if count == 5:
+                stats = measure(lambda: client.get(url), 1)
+                results.append({'case': 'построение индекса', **stats})
+            stats = measure(lambda: client.get(url), options['repeat'])
+            results.append({'case': f'индекс, {count} ингр.', **stats})
+            stats = measure(
+                lambda: list(
+                    Recipy.objects
+                    .annotate(
+                        matched=Count('recipy', filter=Q(
+                            recipy__ingredient_id__in=ingredient_ids[:count]
+                        )),
+                        total=Count('recipy')
+                    )
+                    .filter(matched__gt=0)
+                    .order_by(F('total') - F('matched'), '-matched')[:10]
+                ),
+                options['repeat']
+            )
+            results.append({'case': f'ORM, {count} ингр.', **stats})
+        recipy = Recipy.objects.order_by('id').first()
+        IngredientsForRecipy.objects.filter(recipy=recipy).delete()
+
+        def change_and_match():
+            bump_version('recipes', recipy.pk)
+            client.get(url)
+
+        stats = measure(change_and_match, options['repeat'])
+        results.append({'case': 'после изменения рецепта', **stats})
+    return results
+
+
+@scenario('meal_plan')
+def meal_plan(options):
+    """
+    Список покупок по плану питания на неделю: подсчёт в базе и файл из
+    кэша.
+    """
+    results = []
+    start = datetime.date(2026, 1, 5)
+    for per_day in (1, 3, 5):
+        with sandbox():
+            user = create_user('benchmark')
+            ingredient_ids = create_ingredients(200)
+            recipes = create_recipes(user, 7 * per_day, ingredient_ids, 10)
+            MealPlanEntry.objects.bulk_create(
+                MealPlanEntry(
+                    user=user,
+                    recipy=recipy,
+                    date=start + datetime.timedelta(days=number % 7),
+                    servings=number % 4 + 1
+                )
+                for number, recipy in enumerate(recipes)
+            )
+            client = APIClient()
+            client.force_authenticate(user)
+            url = (
+                '/api/meal_plan/download_shopping_list/'
+                f'?start={start}&format=json'
+            )
+
+            def uncached():
+                bump_version(f'meal_plan:{user.id}')
+                b''.join(client.get(url).streaming_content)
+
+            case = f'в плане {7 * per_day}'
+            stats = measure(uncached, options['repeat'])
+            results.append({'case': f'{case}, из базы', **stats})
+            stats = measure(lambda: client.get(url), options['repeat'])
+            results.append({'case': f'{case}, из кэша', **stats})
+    return results
+
+
+@scenario('conditional')
+def conditional(options):
+    """Рецепт и страница рецептов: полный ответ и 304 по ETag."""
+    results = []
+    with sandbox():
+        user = create_user('benchmark')
+        ingredient_ids = create_ingredients(200)
+        recipes = create_recipes(user, 50, ingredient_ids, 10)
+        client = APIClient()
+        for case, url in (
+            ('рецепт', f'/api/recipes/{recipes[0].id}/'),
+            ('страница', '/api/recipes/?limit=50'),
+        ):
+            etag = client.get(url)['ETag']
+            stats = measure(lambda: client.get(url), options['repeat'])
+            results.append({'case': f'{case}, 200', **stats})
+            stats = measure(
+                lambda: client.get(url, HTTP_IF_NONE_MATCH=etag),
+                options['repeat']
+            )
+            results.append({'case': f'{case}, 304', **stats})
+    return results
+
+
+@scenario('token_auth')
+def token_auth(options):
+    """Запрос с токеном: пользователь из кэша и из базы."""
+    results = []
+    with sandbox():
+        user = create_user('benchmark')
+        client = APIClient()
+        client.credentials(
+            HTTP_AUTHORIZATION=f'Token {Token.objects.create(user=user)}'
+        )
+
+        def uncached():
+            token_cache.clear()
+            client.get('/api/users/me/')
+
+        stats = measure(uncached, options['repeat'])
+        results.append({'case': 'без кэша токенов', **stats})
+        stats = measure(
+            lambda: client.get('/api/users/me/'), options['repeat']
+        )
+        results.append({'case': 'с кэшем токенов', **stats})
+    return results
+
+
+@scenario('bulk_cart')
+def bulk_cart(options):
+    """
+    Добавление рецептов в корзину и удаление из неё: по одному запросу
+    на рецепт и одним запросом со списком.
+    """
+    results = []
+    for count in (10, 50):
+        with sandbox():
+            user = create_user('benchmark')
+            ingredient_ids = create_ingredients(20)
+            recipy_ids = [
+                recipy.id
+                for recipy in create_recipes(user, count, ingredient_ids, 2)
+            ]
+            client = APIClient()
+            client.force_authenticate(user)
+
+            def one_by_one():
+                for recipy_id in recipy_ids:
+                    client.post(f'/api/recipes/{recipy_id}/shopping_cart/')
+                for recipy_id in recipy_ids:
+                    client.delete(f'/api/recipes/{recipy_id}/shopping_cart/')
+
+            def bulk():
+                data = {'recipes': recipy_ids}
+                client.post('/api/recipes/shopping_cart/', data, format='json')
+                client.delete(
+                    '/api/recipes/shopping_cart/', data, format='json'
+                )
+
+            stats = measure(one_by_one, options['repeat'])
+            results.append({'case': f'по одному, {count} рецептов', **stats})
+            stats = measure(bulk, options['repeat'])
+            results.append({'case': f'списком, {count} рецептов', **stats})
+    return results
+
+
+# Эндпойнты для нагрузки на запущенный сервер.
+LOAD_PATHS = (
+    '/api/recipes/download_shopping_cart/',
+    '/api/recipes/?limit=6',
+)
+
+
+def run_concurrently(concurrency, worker, *args):
+    """
+    Запускает worker в concurrency потоках. Возвращает время всех
+    вызовов (мс) и число запросов в секунду.
+    """
+    started = time.perf_counter()
+    with ThreadPoolExecutor(concurrency) as executor:
+        futures = [
+            executor.submit(worker, *args) for _ in range(concurrency)
+        ]
+        timings = list(itertools.chain.from_iterable(
+            future.result() for future in futures
+        ))
+    elapsed = time.perf_counter() - started
+    return timings, round(len(timings) / elapsed, 1)
+
+
+def load_worker(url, headers, repeat):
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        with urlopen(UrlRequest(url, headers=headers)) as response:
+            response.read()
+        timings.append((time.perf_counter() - started) * 1000)
+    return timings
+
+
+@scenario('load')
+def load(options):
+    """
+    Параллельные запросы к запущенному серверу (--url), например к WSGI-
+    и ASGI-развёртыванию по очереди. Токен берётся из --token или
+    создаётся для пользователя из seed_perf_data.
+    """
+    if not options['url']:
+        return []
+    token = options['token']
+    if not token:
+        user = (
+            User.objects.filter(username__startswith=SEED_PREFIX)
+            .order_by('id').first()
+        )
+        if user is None:
+            raise CommandError('Нужен --token или данные seed_perf_data.')
+        token = Token.objects.get_or_create(user=user)[0].key
+    headers = {'Authorization': f'Token {token}'}
+    results = []
+    for path in LOAD_PATHS:
+        for concurrency in sorted({1, options['concurrency']}):
+            timings, rps = run_concurrently(
+                concurrency, load_worker, options['url'] + path, headers,
+                options['repeat']
+            )
+            # Запросы к базе на стороне сервера отсюда не видны.
+            results.append({
+                'case': f'{path} x{concurrency}',
+                **summarize(timings, 0),
+                'rps': rps,
+            })
+    return results
+
+
+def client_worker(path, repeat):
+    client = APIClient()
+    timings = []
+    try:
+        for _ in range(repeat):
+            started = time.perf_counter()
+            client.get(path)
+            timings.append((time.perf_counter() - started) * 1000)
+    finally:
+        connection.close()
+    return timings
+
+
+@scenario('connections')
+def connection_reuse(options):
+    """
+    Запросы из нескольких потоков с новым соединением с базой на каждый
+    запрос (CONN_MAX_AGE=0) и с сохраняемыми соединениями. Для
+    DB_ENGINE=foodgram.db.pooled соединения в обоих случаях берутся
+    из пула.
+    """
+    settings_dict = connection.settings_dict
+    max_age = settings_dict['CONN_MAX_AGE']
+    results = []
+    try:
+        for age in (0, 60):
+            settings_dict['CONN_MAX_AGE'] = age
+            for concurrency in sorted({1, options['concurrency']}):
+                timings, rps = run_concurrently(
+                    concurrency, client_worker, '/api/recipes/?limit=6',
+                    options['repeat']
+                )
+                results.append({
+                    'case': f'CONN_MAX_AGE={age} x{concurrency}',
+                    **summarize(timings, 0),
+                    'rps': rps,
+                })
+    finally:
+        settings_dict['CONN_MAX_AGE'] = max_age
+    return results
+
+
+@scenario('api')
+def api(options):
+    """
+    Основные эндпойнты на данных seed_perf_data. Если их нет, небольшой
+    набор создаётся на время замера.
+    """
+    if not User.objects.filter(username__startswith=SEED_PREFIX).exists():
+        with sandbox():
+            seed(users=50, recipes=500, per_recipy=8,
+                 favorites=20, baskets=10, follows=10)
+            return api(options)
+
+    user = User.objects.filter(username__startswith=SEED_PREFIX).first()
+    recipy_id = Recipy.objects.values_list('id', flat=True).first()
+    tag = Tag.objects.values_list('slug', flat=True).first()
+    prefixes = itertools.cycle(
+        name[:3] for name in Ingredient.objects.values_list(
+            'name', flat=True)[:options['repeat']]
+    )
+    client = APIClient()
+    client.force_authenticate(user)
+    cases = {
+        'список рецептов': lambda: client.get('/api/recipes/'),
+        'рецепты по тегу': lambda: client.get(f'/api/recipes/?tags={tag}'),
+        'рецепты, курсор': lambda: client.get(
+            '/api/recipes/?pagination=cursor'),
+        'рецепт': lambda: client.get(f'/api/recipes/{recipy_id}/'),
+        'подписки': lambda: client.get(
+            '/api/users/subscriptions/?recipes_limit=3'),
+        'поиск ингредиентов': lambda: client.get(
+            f'/api/ingredients/?name={next(prefixes)}'),
+        'список покупок': lambda: download_shopping_cart(client, user),
+    }
+    return [
+        {'case': case, **measure(request, options['repeat'])}
+        for case, request in cases.items()
+    ]
@@ -0,0 +1,137 @@
+"""
+PostgreSQL с пулом соединений внутри процесса.
+
+Подключается через DB_ENGINE=foodgram.db.pooled. Соединения берутся
+из общего для потоков процесса пула и возвращаются в него в конце
+каждого запроса, так что потоки и асинхронные воркеры не открывают
+новое соединение на каждый запрос.
+"""
+import threading
+import time
+
+from django.conf import settings
+from django.db.backends.postgresql import base
+from psycopg2 import OperationalError, extras
+from psycopg2.pool import ThreadedConnectionPool
+
+
+class ConnectionPool:
+    """
+    ThreadedConnectionPool, который при исчерпании ждёт освободившееся
+    соединение, а не сразу возвращает ошибку.
+    """
+
+    def __init__(self, conn_params):
+        self.pool = ThreadedConnectionPool(
+            settings.DB_POOL_SIZE, settings.DB_POOL_MAX_SIZE, **conn_params
+        )
+        self.slots = threading.BoundedSemaphore(settings.DB_POOL_MAX_SIZE)
+        # Когда соединение вернули в пул, по id соединения.
+        self.returned_at = {}
+
+    def getconn(self):
+        if not self.slots.acquire(timeout=settings.DB_POOL_TIMEOUT):
+            raise OperationalError('Нет свободных соединений в пуле.')
+        try:
+            while True:
+                connection = self.pool.getconn()
+                if not self.needs_check(connection) or is_alive(connection):
+                    return connection
+                self.pool.putconn(connection, close=True)
+        except Exception:
+            self.slots.release()
+            raise
+
+    def needs_check(self, connection):
+        returned_at = self.returned_at.pop(id(connection), None)
+        return settings.DB_HEALTH_CHECKS and (
+            returned_at is None
+            or time.monotonic() - returned_at > settings.DB_HEALTH_CHECK_IDLE
+        )
+
+    def closeall(self):
+        self.pool.closeall()
+
+    def putconn(self, connection):
+        try:
+            if not connection.closed:
+                self.returned_at[id(connection)] = time.monotonic()
+            self.pool.putconn(connection, close=bool(connection.closed))
+        finally:
+            self.slots.release()
+
+
+def is_alive(connection):
+    if connection.closed:
+        return False
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT 1')
+    except OperationalError:
+        return False
+    # SELECT открыл транзакцию, если autocommit выключен.
+    connection.rollback()
+    return True
+
+
+# Пулы по параметрам подключения: тесты меняют имя базы у того же
+# псевдонима, и соединения к старой базе из пула брать нельзя.
+pools = {}
+pools_lock = threading.Lock()
+
+
+def get_pool(conn_params):
+    key = tuple(sorted((name, str(value))
+                       for name, value in conn_params.items()))
+    with pools_lock:
+        if key not in pools:
+            pools[key] = ConnectionPool(conn_params)
+        return pools[key]
+
+
+def close_pools():
+    with pools_lock:
+        for pool in pools.values():
+            pool.closeall()
+        pools.clear()
+
+
+class DatabaseCreation(base.DatabaseCreation):
+
+    def _destroy_test_db(self, test_database_name, verbosity):
+        # Открытые соединения пула не дают удалить тестовую базу.
+        close_pools()
+        super()._destroy_test_db(test_database_name, verbosity)
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    creation_class = DatabaseCreation
+    pool = None
+
+    def get_new_connection(self, conn_params):
+        # То же, что в базовом классе, но соединение берётся из пула.
+        self.pool = get_pool(conn_params)
+        connection = self.pool.getconn()
+        options = self.settings_dict['OPTIONS']
+        try:
+            self.isolation_level = options['isolation_level']
+        except KeyError:
+            self.isolation_level = connection.isolation_level
+        else:
+            if self.isolation_level != connection.isolation_level:
+                connection.set_session(isolation_level=self.isolation_level)
+        extras.register_default_jsonb(
+            conn_or_curs=connection, loads=lambda x: x
+        )
+        return connection
+
+    def connect(self):
+        super().connect()
+        # Вернуть соединение в пул в конце запроса, а не держать его
+        # в потоке CONN_MAX_AGE секунд.
+        self.close_at = time.monotonic()
+
+    def _close(self):
+        if self.connection is not None:
+            with self.wrap_database_errors:
+                self.pool.putconn(self.connection)
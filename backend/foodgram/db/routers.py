@@ -0,0 +1,106 @@
+"""
+Чтение с реплик базы.
+
+Запросы к базе уходят на реплику только внутри представлений с
+ReplicaReadMixin, все остальные — в основную базу. После записи
+пользователь на DB_REPLICA_STICKY_SECONDS закрепляется за основной
+базой, чтобы читать свои изменения. Для всех пользователей за ней
+ненадолго закрепляются только долго кэшируемые теги и ингредиенты.
+"""
+import random
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import MiddlewareNotUsed
+
+# Реплика, с которой читает текущий запрос, или None.
+read_replica = ContextVar('read_replica', default=None)
+
+
+def replica_aliases():
+    return [alias for alias in settings.DATABASES if alias != 'default']
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        return read_replica.get()
+
+    def db_for_write(self, model, **hints):
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Реплики содержат те же данные, что и основная база.
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == 'default'
+
+
+def primary_key(name):
+    return f'primary:{name}'
+
+
+def stick_to_primary(name):
+    """Читать данные name с основной базы, пока реплики не догонят её."""
+    if replica_aliases():
+        cache.set(primary_key(name), True, settings.DB_REPLICA_STICKY_SECONDS)
+
+
+def sticks_to_primary(names):
+    return bool(cache.get_many([primary_key(name) for name in names]))
+
+
+class StickyPrimaryMiddleware:
+    """Закрепляет за основной базой пользователя, который что-то изменил."""
+
+    def __init__(self, get_response):
+        if not replica_aliases():
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        # Токен проверяет DRF, он же сохраняет пользователя в запрос.
+        user = getattr(request, 'user', None)
+        if (request.method not in ('GET', 'HEAD', 'OPTIONS')
+                and response.status_code < 400
+                and user is not None and user.is_authenticated):
+            stick_to_primary(f'user:{user.id}')
+        return response
+
+
+class ReplicaReadMixin:
+    """
+    Выполняет действия replica_actions вьюсета на случайной реплике. В
+    replica_namespaces перечисляются пространства имён кэша, при
+    изменении которых чтение ненадолго возвращается в основную базу.
+    """
+    replica_actions = ('list', 'retrieve')
+    replica_namespaces = ()
+    replica_token = None
+
+    def use_replica(self, request):
+        if self.action not in self.replica_actions:
+            return False
+        names = [f'namespace:{name}' for name in self.replica_namespaces]
+        if request.user.is_authenticated:
+            names.append(f'user:{request.user.id}')
+        return not sticks_to_primary(names)
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        aliases = replica_aliases()
+        if aliases and self.use_replica(request):
+            self.replica_token = read_replica.set(random.choice(aliases))
+
+    def dispatch(self, request, *args, **kwargs):
+        # Необработанное исключение DRF пробрасывает дальше, не вызывая
+        # finalize_response, поэтому реплику сбрасываем здесь: иначе она
+        # останется у потока и для следующих запросов.
+        try:
+            return super().dispatch(request, *args, **kwargs)
+        finally:
+            if self.replica_token is not None:
+                read_replica.reset(self.replica_token)
+                self.replica_token = None
@@ -32,12 +32,18 @@ INSTALLED_APPS = [
     'api'
 ]
 
+# Нагрузочные замеры: команды seed_perf_data и benchmark.
+if os.getenv('BENCHMARKS_ENABLED') == 'True':
+    INSTALLED_APPS.append('benchmarks')
+
 MIDDLEWARE = [
+    'api.profiling.QueryProfilerMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'foodgram.db.routers.StickyPrimaryMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -69,10 +75,110 @@ DATABASES = {
         'USER': os.getenv('POSTGRES_USER', default='postgres'),
         'PASSWORD': os.getenv('POSTGRES_PASSWORD', default='postgres'),
         'HOST': os.getenv('DB_HOST', default='db'),
-        'PORT': os.getenv('DB_PORT', default=5432)
+        'PORT': os.getenv('DB_PORT', default=5432),
+        'CONN_MAX_AGE': int(os.getenv('DB_CONN_MAX_AGE', default=60)),
     }
 }
 
+# Реплики только для чтения: адреса через запятую, остальные параметры
+# подключения те же, что у основной базы. В тестах реплики читают
+# основную базу.
+DB_REPLICA_HOSTS = [
+    host.strip()
+    for host in os.getenv('DB_REPLICA_HOSTS', default='').split(',')
+    if host.strip()
+]
+
+for number, host in enumerate(DB_REPLICA_HOSTS, 1):
+    DATABASES[f'replica_{number}'] = {
+        **DATABASES['default'],
+        'HOST': host,
+        'TEST': {'MIRROR': 'default'},
+    }
+
+DATABASE_ROUTERS = ['foodgram.db.routers.ReplicaRouter']
+
+# Сколько секунд после записи читать с основной базы, пока реплики
+# не получили изменения.
+DB_REPLICA_STICKY_SECONDS = float(os.getenv('DB_REPLICA_STICKY_SECONDS', default=5))
+
+# Проверять в начале запроса, что сохранённое соединение с базой живо.
+# Проверяются только соединения, простоявшие без запросов дольше
+# DB_HEALTH_CHECK_IDLE секунд.
+DB_HEALTH_CHECKS = (os.getenv('DB_HEALTH_CHECKS', default='True') == 'True')
+
+DB_HEALTH_CHECK_IDLE = float(os.getenv('DB_HEALTH_CHECK_IDLE', default=10))
+
+# Пул соединений для DB_ENGINE=foodgram.db.pooled: сколько соединений
+# держать открытыми, сколько открывать максимум и сколько секунд ждать
+# свободного. Больше соединений, чем потоков в воркере, пулу не нужно.
+DB_POOL_SIZE = int(os.getenv('DB_POOL_SIZE', default=2))
+
+DB_POOL_MAX_SIZE = int(os.getenv('DB_POOL_MAX_SIZE', default=4))
+
+DB_POOL_TIMEOUT = float(os.getenv('DB_POOL_TIMEOUT', default=10))
+
+# Версии данных в кэше должны видеть все воркеры gunicorn и команды
+# manage.py, поэтому при развёртывании нужен общий кэш: docker-compose
+# подключает memcached. Кэш в памяти процесса годится только для
+# разработки и тестов.
+CACHES = {
+    'default': {
+        'BACKEND': os.getenv('CACHE_BACKEND', default='django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': os.getenv('CACHE_LOCATION', default='foodgram'),
+    }
+}
+
+RESPONSE_CACHE_TIMEOUT = int(os.getenv('RESPONSE_CACHE_TIMEOUT', default=60 * 60))
+
+QUERY_PROFILER_ENABLED = (os.getenv('QUERY_PROFILER_ENABLED') == 'True')
+
+# Добавлять ли к ответам заголовки Server-Timing и X-Query-Count.
+QUERY_PROFILER_HEADERS = (os.getenv('QUERY_PROFILER_HEADERS') == 'True')
+
+# Доля запросов, попадающих в профилирование (от 0 до 1).
+QUERY_PROFILER_SAMPLE_RATE = float(os.getenv('QUERY_PROFILER_SAMPLE_RATE', default=0.05))
+
+QUERY_PROFILER_LOG = os.getenv('QUERY_PROFILER_LOG', default=os.path.join(BASE_DIR, 'perf.log'))
+
+QUERY_PROFILER_FLUSH_EVERY = int(os.getenv('QUERY_PROFILER_FLUSH_EVERY', default=50))
+
+INGREDIENT_SEARCH_LIMIT = int(os.getenv('INGREDIENT_SEARCH_LIMIT', default=50))
+
+# Сколько самых релевантных рецептов отдаёт поиск без PostgreSQL.
+RECIPE_SEARCH_LIMIT = int(os.getenv('RECIPE_SEARCH_LIMIT', default=500))
+
+# Сколько токенов и на сколько секунд запоминать при аутентификации.
+TOKEN_CACHE_SIZE = int(os.getenv('TOKEN_CACHE_SIZE', default=10000))
+
+TOKEN_CACHE_TIMEOUT = int(os.getenv('TOKEN_CACHE_TIMEOUT', default=60))
+
+# Сколько секунд nginx и браузеры могут отдавать рецепты анонимным
+# пользователям без обращения к серверу.
+PUBLIC_CACHE_MAX_AGE = int(os.getenv('PUBLIC_CACHE_MAX_AGE', default=60))
+
+# Сколько изменяющих запросов к подпискам, избранному и корзине можно
+# сделать подряд и за какой период запас восстанавливается.
+WRITE_THROTTLE_RATE = os.getenv('WRITE_THROTTLE_RATE', default='60/min')
+
+# Хранить лимиты в общем кэше, а не в памяти каждого процесса.
+THROTTLE_SHARED_CACHE = (os.getenv('THROTTLE_SHARED_CACHE') == 'True')
+
+THROTTLE_LOCAL_SIZE = int(os.getenv('THROTTLE_LOCAL_SIZE', default=10000))
+
+# Сколько секунд одинаковый запрос ждёт ответа на первый.
+COALESCE_TIMEOUT = float(os.getenv('COALESCE_TIMEOUT', default=10))
+
+# Шрифт с кириллицей для выгрузки списка покупок в PDF.
+PDF_FONT_PATH = os.getenv('PDF_FONT_PATH', default='/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf')
+
+# Через сколько часов вклад добавления в избранное или корзину
+# в рейтинг популярных рецептов уменьшается вдвое.
+TRENDING_HALF_LIFE_HOURS = float(os.getenv('TRENDING_HALF_LIFE_HOURS', default=72))
+
+# За сколько дней учитываются события при полном пересчёте рейтинга.
+TRENDING_WINDOW_DAYS = int(os.getenv('TRENDING_WINDOW_DAYS', default=7))
+
 AUTH_PASSWORD_VALIDATORS = [
     {
         'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator',
@@ -108,6 +214,11 @@ STATIC_ROOT = os.path.join(BASE_DIR, 'static')
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
+IMAGE_PIPELINE_WORKERS = int(os.getenv('IMAGE_PIPELINE_WORKERS', default=2))
+
+# Обрабатывать изображения сразу в потоке запроса (для отладки).
+IMAGE_PIPELINE_SYNC = (os.getenv('IMAGE_PIPELINE_SYNC') == 'True')
+
 AUTH_USER_MODEL = 'users.User'
 
 REST_FRAMEWORK = {
@@ -116,11 +227,17 @@ REST_FRAMEWORK = {
     ],
 
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework.authentication.TokenAuthentication',
+        'api.authentication.CachedTokenAuthentication',
     ],
 
     'DEFAULT_PAGINATION_CLASS': 'api.paginations.PageNumberPagination',
-    'PAGE_SIZE': 6
+    'PAGE_SIZE': 6,
+
+    'DEFAULT_THROTTLE_RATES': {
+        'subscribe': WRITE_THROTTLE_RATE,
+        'favorite': WRITE_THROTTLE_RATE,
+        'shopping_cart': WRITE_THROTTLE_RATE,
+    },
 }
 
 
@@ -0,0 +1,59 @@
+"""
+Настройки gunicorn.
+
+По умолчанию приложение WSGI обслуживается воркерами с потоками, чтобы
+один медленный запрос не занимал воркер целиком. С GUNICORN_ASGI=True
+запускается приложение ASGI в воркерах uvicorn.
+"""
+import os
+
+bind = os.getenv('GUNICORN_BIND', default='0:8000')
+
+
+def available_cpus():
+    """
+    Процессоры, доступные контейнеру: cpu_count() возвращает все
+    процессоры хоста, а ограничение docker --cpus видно только в cgroup.
+    """
+    cpus = len(os.sched_getaffinity(0))
+    try:
+        with open('/sys/fs/cgroup/cpu.max') as file:
+            quota, period = file.read().split()
+    except (OSError, ValueError):
+        return cpus
+    if quota == 'max':
+        return cpus
+    return max(1, min(cpus, int(quota) // int(period)))
+
+
+workers = int(os.getenv(
+    'GUNICORN_WORKERS', default=available_cpus() * 2 + 1
+))
+
+timeout = int(os.getenv('GUNICORN_TIMEOUT', default=60))
+
+if os.getenv('GUNICORN_ASGI') == 'True':
+    wsgi_app = 'foodgram.asgi:application'
+    worker_class = 'uvicorn.workers.UvicornWorker'
+else:
+    wsgi_app = 'foodgram.wsgi:application'
+    worker_class = 'gthread'
+    threads = int(os.getenv('GUNICORN_THREADS', default=4))
+
+
+def on_starting(server):
+    # Каждый поток воркера держит своё соединение с базой CONN_MAX_AGE
+    # секунд, с пулом — до DB_POOL_MAX_SIZE соединений на воркер. Вместе
+    # с другими контейнерами их должно хватать в max_connections.
+    if os.getenv('DB_ENGINE') == 'foodgram.db.pooled':
+        per_worker = int(os.getenv('DB_POOL_MAX_SIZE', default=4))
+    else:
+        per_worker = server.cfg.threads
+    total = server.cfg.workers * per_worker
+    limit = int(os.getenv('DB_MAX_CONNECTIONS', default=100))
+    if total > limit:
+        server.log.warning(
+            'Воркерам может понадобиться %s соединений с базой, '
+            'а DB_MAX_CONNECTIONS=%s. Уменьшите GUNICORN_WORKERS, '
+            'GUNICORN_THREADS или DB_POOL_MAX_SIZE.', total, limit
+        )
@@ -1,7 +1,7 @@
 from django.contrib import admin
 
 from .models import (Basket, Favorite, Ingredient, IngredientsForRecipy,
-                     Recipy, Tag)
+                     MealPlanEntry, Recipy, RecipyTag, Tag, TrendingRecipy)
 
 
 class TagAdmin(admin.ModelAdmin):
@@ -19,14 +19,21 @@ class IngredientsForRecipyAdmin(admin.StackedInline):
     extra = 0
 
 
+class RecipyTagAdmin(admin.TabularInline):
+    model = RecipyTag
+    extra = 0
+
+
 class RecipyAdmin(admin.ModelAdmin):
-    inlines = (IngredientsForRecipyAdmin, )
+    inlines = (IngredientsForRecipyAdmin, RecipyTagAdmin)
     list_display = (
         'author',
         'name',
         'image',
         'text',
         'cooking_time',
+        'favorites_count',
+        'in_baskets_count',
     )
     search_fields = ('author', 'name', 'tags')
     list_filter = ('author', 'name', 'tags')
@@ -42,8 +49,20 @@ class FavoriteAdmin(admin.ModelAdmin):
     search_fields = ('user',)
 
 
+class TrendingRecipyAdmin(admin.ModelAdmin):
+    list_display = ('recipy', 'score', 'updated_at')
+
+
+class MealPlanEntryAdmin(admin.ModelAdmin):
+    list_display = ('user', 'date', 'recipy', 'servings')
+    list_filter = ('date',)
+    search_fields = ('user__username',)
+
+
 admin.site.register(Recipy, RecipyAdmin)
 admin.site.register(Ingredient, IngredientAdmin)
 admin.site.register(Tag, TagAdmin)
 admin.site.register(Favorite, FavoriteAdmin)
 admin.site.register(Basket, BasketAdmin)
+admin.site.register(TrendingRecipy, TrendingRecipyAdmin)
+admin.site.register(MealPlanEntry, MealPlanEntryAdmin)
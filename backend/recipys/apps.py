@@ -3,3 +3,6 @@ from django.apps import AppConfig
 
 class RecipysConfig(AppConfig):
     name = 'recipys'
+
+    def ready(self):
+        from . import signals  # noqa: F401
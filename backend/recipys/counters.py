@@ -0,0 +1,71 @@
+"""
+Счётчики, хранящиеся в самих моделях, чтобы не считать COUNT по
+связанным таблицам при каждом запросе.
+"""
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce, Greatest
+from users.models import Follow, User
+
+from .models import Basket, Favorite, Recipy
+
+# Модель и поле счётчика, модель связанных записей и её внешний ключ.
+COUNTERS = (
+    (Recipy, 'favorites_count', Favorite, 'recipy'),
+    (Recipy, 'in_baskets_count', Basket, 'recipy'),
+    (User, 'recipes_count', Recipy, 'author'),
+    (User, 'followers_count', Follow, 'author'),
+)
+
+
+def change_counter(model, pk, field, delta):
+    """Атомарно меняет счётчик на delta, не опуская его ниже нуля."""
+    if pk is None:
+        return
+    change_counters(model, [pk], field, delta)
+
+
+def change_counters(model, pks, field, delta):
+    """То же для нескольких объектов одним запросом."""
+    if not pks:
+        return
+    model.objects.filter(pk__in=pks).update(
+        **{field: Greatest(F(field) + delta, 0)}
+    )
+
+
+def actual_count(related_model, field_name):
+    """Подзапрос с настоящим числом связанных записей."""
+    return Coalesce(Subquery(
+        related_model.objects
+        .filter(**{field_name: OuterRef('pk')})
+        .order_by()
+        .values(field_name)
+        .annotate(total=Count('pk'))
+        .values('total')
+    ), 0)
+
+
+def reconcile(model, field, related_model, field_name):
+    """
+    Исправляет расхождения счётчика с данными.
+    Возвращает число исправленных записей.
+    """
+    drifted = (
+        model.objects
+        .annotate(actual=actual_count(related_model, field_name))
+        .exclude(**{field: F('actual')})
+        .values('pk')
+    )
+    return model.objects.filter(pk__in=drifted).update(
+        **{field: actual_count(related_model, field_name)}
+    )
+
+
+def reconcile_all():
+    """Сверяет все счётчики. Возвращает число исправлений по каждому."""
+    return {
+        f'{model.__name__}.{field}': reconcile(
+            model, field, related_model, field_name
+        )
+        for model, field, related_model, field_name in COUNTERS
+    }
@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from recipys.counters import reconcile_all
+
+
+class Command(BaseCommand):
+    help = ('Пересчитывает счётчики избранного, корзин, рецептов '
+            'и подписчиков, исправляя только разошедшиеся записи.')
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            fixed = reconcile_all()
+        for counter, count in fixed.items():
+            self.stdout.write(f'{counter}: исправлено {count}')
+        self.stdout.write(self.style.SUCCESS(
+            f'Всего исправлено: {sum(fixed.values())}'
+        ))
@@ -0,0 +1,24 @@
+import time
+
+from django.core.management.base import BaseCommand
+from recipys.trending import refresh_trending
+
+
+class Command(BaseCommand):
+    help = ('Обновляет рейтинг популярных рецептов с учётом новых '
+            'добавлений в избранное и корзину. Запускается по расписанию, '
+            'одновременно должен работать только один экземпляр.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--full', action='store_true',
+            help='Построить рейтинг заново, а не дополнить.'
+        )
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        total = refresh_trending(full=options['full'])
+        self.stdout.write(self.style.SUCCESS(
+            f'Рецептов в рейтинге: {total}, '
+            f'пересчитано за {time.perf_counter() - started:.2f} с.'
+        ))
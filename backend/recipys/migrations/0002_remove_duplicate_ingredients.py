@@ -0,0 +1,56 @@
+# Generated by Django 3.2.15 on 2026-10-18 19:11
+
+from django.db import migrations, models
+
+
+def remove_duplicate_ingredients(apps, schema_editor):
+    """
+    Оставляет по одному ингредиенту на пару (название, единицы измерения),
+    переназначая на него ингредиенты рецептов. Если в рецепте уже есть
+    оставленный ингредиент, количество дубля прибавляется к нему.
+    """
+    Ingredient = apps.get_model('recipys', 'Ingredient')
+    IngredientsForRecipy = apps.get_model('recipys', 'IngredientsForRecipy')
+    duplicates = (
+        Ingredient.objects
+        .values('name', 'measurement_unit')
+        .annotate(keep_id=models.Min('id'), total=models.Count('id'))
+        .filter(total__gt=1)
+    )
+    for duplicate in duplicates:
+        keep_id = duplicate['keep_id']
+        extra_ids = (
+            Ingredient.objects
+            .filter(name=duplicate['name'],
+                    measurement_unit=duplicate['measurement_unit'])
+            .exclude(id=keep_id)
+            .values_list('id', flat=True)
+        )
+        for extra_id in list(extra_ids):
+            rows = IngredientsForRecipy.objects.filter(ingredient_id=extra_id)
+            kept = {
+                item.recipy_id: item
+                for item in IngredientsForRecipy.objects.filter(
+                    ingredient_id=keep_id,
+                    recipy__in=rows.values('recipy')
+                )
+            }
+            for row in rows.filter(recipy__in=list(kept)):
+                kept[row.recipy_id].amount += row.amount
+            IngredientsForRecipy.objects.bulk_update(kept.values(), ['amount'])
+            rows.filter(recipy__in=list(kept)).delete()
+            rows.update(ingredient_id=keep_id)
+            Ingredient.objects.filter(id=extra_id).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipys', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            remove_duplicate_ingredients, migrations.RunPython.noop
+        ),
+    ]
@@ -0,0 +1,20 @@
+# Generated by Django 3.2.15 on 2026-10-18 19:11
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    # Ограничение добавляется отдельной миграцией: в PostgreSQL ALTER TABLE
+    # нельзя выполнить в одной транзакции с удалением дублей, пока не
+    # сработали отложенные проверки внешних ключей.
+
+    dependencies = [
+        ('recipys', '0002_remove_duplicate_ingredients'),
+    ]
+
+    operations = [
+        migrations.AddConstraint(
+            model_name='ingredient',
+            constraint=models.UniqueConstraint(fields=('name', 'measurement_unit'), name='unique_ingredient'),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 3.2.15 on 2026-10-18 19:14
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipys', '0003_unique_ingredient'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='recipy',
+            name='image_medium',
+            field=models.ImageField(blank=True, upload_to='recipes/medium/', verbose_name='изображение среднего размера'),
+        ),
+        migrations.AddField(
+            model_name='recipy',
+            name='image_thumbnail',
+            field=models.ImageField(blank=True, upload_to='recipes/thumbnails/', verbose_name='миниатюра'),
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 3.2.15 on 2026-10-18 19:16
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipys', '0004_image_renditions'),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='recipy',
+            options={'ordering': ['-pub_date', '-id'], 'verbose_name': 'рецепт', 'verbose_name_plural': 'рецепты'},
+        ),
+        migrations.AddIndex(
+            model_name='recipy',
+            index=models.Index(fields=['-pub_date', '-id'], name='recipy_pub_date_id_idx'),
+        ),
+    ]
@@ -0,0 +1,51 @@
+# Generated by Django 3.2.15 on 2026-10-18 19:16
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipys', '0005_recipy_pub_date_index'),
+    ]
+
+    # Таблица связи рецептов и тегов уже создана Django, явная модель
+    # связи добавляется только в состояние миграций. В базе создаётся
+    # лишь индекс по (tag_id, recipy_id) для выборок по тегу.
+    operations = [
+        migrations.SeparateDatabaseAndState(
+            database_operations=[
+                migrations.RunSQL(
+                    'CREATE INDEX recipy_tags_tag_recipy_idx '
+                    'ON recipys_recipy_tags (tag_id, recipy_id);',
+                    'DROP INDEX recipy_tags_tag_recipy_idx;'
+                ),
+            ],
+            state_operations=[
+                migrations.CreateModel(
+                    name='RecipyTag',
+                    fields=[
+                        ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                        ('recipy', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='recipys.recipy', verbose_name='рецепт')),
+                        ('tag', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='recipys.tag', verbose_name='тег')),
+                    ],
+                    options={
+                        'verbose_name': 'тег рецепта',
+                        'verbose_name_plural': 'теги рецептов',
+                        'db_table': 'recipys_recipy_tags',
+                        'unique_together': {('recipy', 'tag')},
+                    },
+                ),
+                migrations.AddIndex(
+                    model_name='recipytag',
+                    index=models.Index(fields=['tag', 'recipy'], name='recipy_tags_tag_recipy_idx'),
+                ),
+                migrations.AlterField(
+                    model_name='recipy',
+                    name='tags',
+                    field=models.ManyToManyField(related_name='recipy', through='recipys.RecipyTag', to='recipys.Tag', verbose_name='теги'),
+                ),
+            ],
+        ),
+    ]
@@ -0,0 +1,57 @@
+# Generated by Django 3.2.15 on 2026-10-18 19:20
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def actual_count(related_model, field_name):
+    """
+    Подзапрос с числом связанных записей. Запрос повторяет
+    recipys.counters, но не импортирует код приложения: миграция должна
+    работать и после того, как модуль изменится.
+    """
+    return Coalesce(Subquery(
+        related_model.objects
+        .filter(**{field_name: OuterRef('pk')})
+        .order_by()
+        .values(field_name)
+        .annotate(total=Count('pk'))
+        .values('total')
+    ), 0)
+
+
+def fill_counters(apps, schema_editor):
+    apps.get_model('recipys', 'Recipy').objects.update(
+        favorites_count=actual_count(
+            apps.get_model('recipys', 'Favorite'), 'recipy'
+        ),
+        in_baskets_count=actual_count(
+            apps.get_model('recipys', 'Basket'), 'recipy'
+        ),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipys', '0006_recipy_tags_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='recipy',
+            name='favorites_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='в избранном'),
+        ),
+        migrations.AddField(
+            model_name='recipy',
+            name='in_baskets_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='в корзинах'),
+        ),
+        migrations.AddIndex(
+            model_name='recipy',
+            index=models.Index(fields=['-favorites_count', '-id'], name='recipy_favorites_count_idx'),
+        ),
+        migrations.RunPython(fill_counters, migrations.RunPython.noop),
+    ]
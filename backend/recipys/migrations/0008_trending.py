@@ -0,0 +1,50 @@
+# Generated by Django 3.2.15 on 2026-10-18 19:40
+
+import datetime
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.utils.timezone import utc
+
+# Когда добавлены существующие записи, неизвестно. Давняя дата оставляет
+# их за окном рейтинга, иначе первый пересчёт счёл бы их все новыми.
+BEFORE_TRENDING = datetime.datetime(1970, 1, 1, tzinfo=utc)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipys', '0007_counters'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='basket',
+            name='added_at',
+            field=models.DateTimeField(auto_now_add=True, db_index=True, default=BEFORE_TRENDING, verbose_name='добавлен в корзину'),
+            preserve_default=False,
+        ),
+        migrations.AddField(
+            model_name='favorite',
+            name='added_at',
+            field=models.DateTimeField(auto_now_add=True, db_index=True, default=BEFORE_TRENDING, verbose_name='добавлен в избранное'),
+            preserve_default=False,
+        ),
+        migrations.CreateModel(
+            name='TrendingRecipy',
+            fields=[
+                ('recipy', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='trending', serialize=False, to='recipys.recipy', verbose_name='рецепт')),
+                ('score', models.FloatField(default=0, verbose_name='очки')),
+                ('updated_at', models.DateTimeField(verbose_name='пересчитан')),
+            ],
+            options={
+                'verbose_name': 'популярный рецепт',
+                'verbose_name_plural': 'популярные рецепты',
+                'ordering': ['-score', '-recipy'],
+            },
+        ),
+        migrations.AddIndex(
+            model_name='trendingrecipy',
+            index=models.Index(fields=['-score', '-recipy'], name='trending_score_idx'),
+        ),
+    ]
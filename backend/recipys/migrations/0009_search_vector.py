@@ -0,0 +1,47 @@
+# Generated by Django 3.2.15 on 2026-10-18 19:31
+
+import django.contrib.postgres.search
+from django.db import migrations
+
+# Индекс и вектор нужны только в PostgreSQL, в SQLite поиск идёт
+# по индексу в памяти процесса.
+CREATE_INDEX = """
+CREATE INDEX recipy_search_vector_idx
+ON recipys_recipy USING GIN (search_vector);
+UPDATE recipys_recipy AS recipy SET search_vector =
+    setweight(to_tsvector('russian', recipy.name), 'A')
+    || setweight(to_tsvector('russian', coalesce((
+        SELECT string_agg(ingredient.name, ' ')
+        FROM recipys_ingredientsforrecipy AS item
+        JOIN recipys_ingredient AS ingredient
+            ON ingredient.id = item.ingredient_id
+        WHERE item.recipy_id = recipy.id
+    ), '')), 'B')
+    || setweight(to_tsvector('russian', recipy.text), 'C');
+"""
+
+
+def create_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute(CREATE_INDEX)
+
+
+def drop_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute('DROP INDEX recipy_search_vector_idx;')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipys', '0008_trending'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='recipy',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
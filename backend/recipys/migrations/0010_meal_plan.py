@@ -0,0 +1,36 @@
+# Generated by Django 3.2.15 on 2026-10-18 19:39
+
+from django.conf import settings
+import django.core.validators
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('recipys', '0009_search_vector'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MealPlanEntry',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField(verbose_name='дата')),
+                ('servings', models.PositiveSmallIntegerField(default=1, validators=[django.core.validators.MinValueValidator(1), django.core.validators.MaxValueValidator(100)], verbose_name='порции')),
+                ('recipy', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='meal_plan', to='recipys.recipy', verbose_name='рецепт')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='meal_plan', to=settings.AUTH_USER_MODEL, verbose_name='пользователь')),
+            ],
+            options={
+                'verbose_name': 'блюдо в плане питания',
+                'verbose_name_plural': 'план питания',
+                'ordering': ['date', 'id'],
+            },
+        ),
+        migrations.AddIndex(
+            model_name='mealplanentry',
+            index=models.Index(fields=['user', 'date'], name='meal_plan_user_date_idx'),
+        ),
+    ]
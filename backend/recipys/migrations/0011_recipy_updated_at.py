@@ -0,0 +1,26 @@
+# Generated by Django 3.2.15 on 2026-10-18 20:05
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+def set_updated_at(apps, schema_editor):
+    Recipy = apps.get_model('recipys', 'Recipy')
+    Recipy.objects.update(updated_at=models.F('pub_date'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipys', '0010_meal_plan'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='recipy',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, default=django.utils.timezone.now, verbose_name='дата изменения'),
+            preserve_default=False,
+        ),
+        migrations.RunPython(set_updated_at, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,140 @@
+from django.db import migrations
+
+# Поисковый вектор пересчитывают триггеры PostgreSQL, чтобы он не
+# устаревал при изменениях в обход API: в админке, через ORM, массовыми
+# запросами и при переименовании ингредиента.
+CREATE_TRIGGERS = """
+CREATE FUNCTION recipys_search_vector(integer, text, text)
+RETURNS tsvector LANGUAGE sql STABLE AS $$
+    SELECT setweight(to_tsvector('russian', coalesce($2, '')), 'A')
+        || setweight(to_tsvector('russian', coalesce((
+            SELECT string_agg(ingredient.name, ' ')
+            FROM recipys_ingredientsforrecipy AS item
+            JOIN recipys_ingredient AS ingredient
+                ON ingredient.id = item.ingredient_id
+            WHERE item.recipy_id = $1
+        ), '')), 'B')
+        || setweight(to_tsvector('russian', coalesce($3, '')), 'C');
+$$;
+
+-- Вектор пересчитывается при новом названии или описании и когда его
+-- сбросили в NULL. Иначе остаётся прежним: save() записывает и вектор,
+-- который мог устареть в загруженном объекте.
+CREATE FUNCTION recipys_recipy_search_vector() RETURNS trigger
+LANGUAGE plpgsql AS $$
+BEGIN
+    IF TG_OP = 'INSERT' OR NEW.search_vector IS NULL THEN
+        NEW.search_vector := recipys_search_vector(NEW.id, NEW.name, NEW.text);
+    ELSIF NEW.name IS DISTINCT FROM OLD.name
+            OR NEW.text IS DISTINCT FROM OLD.text THEN
+        NEW.search_vector := recipys_search_vector(NEW.id, NEW.name, NEW.text);
+    ELSE
+        NEW.search_vector := OLD.search_vector;
+    END IF;
+    RETURN NEW;
+END;
+$$;
+
+CREATE TRIGGER recipys_recipy_search_vector
+BEFORE INSERT OR UPDATE ON recipys_recipy
+FOR EACH ROW EXECUTE PROCEDURE recipys_recipy_search_vector();
+
+CREATE FUNCTION recipys_refresh_search_vector(recipy_ids integer[])
+RETURNS void LANGUAGE sql AS $$
+    UPDATE recipys_recipy SET search_vector = NULL
+    WHERE id = ANY(recipy_ids);
+$$;
+
+-- Ингредиенты рецептов меняются пачками, поэтому вектор пересчитывается
+-- один раз на запрос по таблицам изменённых строк.
+CREATE FUNCTION recipys_items_search_vector() RETURNS trigger
+LANGUAGE plpgsql AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        PERFORM recipys_refresh_search_vector(
+            ARRAY(SELECT DISTINCT recipy_id FROM new_items)
+        );
+    ELSIF TG_OP = 'DELETE' THEN
+        PERFORM recipys_refresh_search_vector(
+            ARRAY(SELECT DISTINCT recipy_id FROM old_items)
+        );
+    ELSE
+        PERFORM recipys_refresh_search_vector(ARRAY(
+            SELECT recipy_id FROM new_items
+            UNION SELECT recipy_id FROM old_items
+        ));
+    END IF;
+    RETURN NULL;
+END;
+$$;
+
+CREATE TRIGGER recipys_items_insert_search_vector
+AFTER INSERT ON recipys_ingredientsforrecipy
+REFERENCING NEW TABLE AS new_items
+FOR EACH STATEMENT EXECUTE PROCEDURE recipys_items_search_vector();
+
+CREATE TRIGGER recipys_items_update_search_vector
+AFTER UPDATE ON recipys_ingredientsforrecipy
+REFERENCING OLD TABLE AS old_items NEW TABLE AS new_items
+FOR EACH STATEMENT EXECUTE PROCEDURE recipys_items_search_vector();
+
+CREATE TRIGGER recipys_items_delete_search_vector
+AFTER DELETE ON recipys_ingredientsforrecipy
+REFERENCING OLD TABLE AS old_items
+FOR EACH STATEMENT EXECUTE PROCEDURE recipys_items_search_vector();
+
+CREATE FUNCTION recipys_ingredient_search_vector() RETURNS trigger
+LANGUAGE plpgsql AS $$
+BEGIN
+    PERFORM recipys_refresh_search_vector(ARRAY(
+        SELECT recipy_id FROM recipys_ingredientsforrecipy
+        WHERE ingredient_id = NEW.id
+    ));
+    RETURN NULL;
+END;
+$$;
+
+CREATE TRIGGER recipys_ingredient_search_vector
+AFTER UPDATE OF name ON recipys_ingredient
+FOR EACH ROW WHEN (OLD.name IS DISTINCT FROM NEW.name)
+EXECUTE PROCEDURE recipys_ingredient_search_vector();
+
+UPDATE recipys_recipy SET search_vector = NULL;
+"""
+
+DROP_TRIGGERS = """
+DROP TRIGGER recipys_ingredient_search_vector ON recipys_ingredient;
+DROP TRIGGER recipys_items_delete_search_vector
+    ON recipys_ingredientsforrecipy;
+DROP TRIGGER recipys_items_update_search_vector
+    ON recipys_ingredientsforrecipy;
+DROP TRIGGER recipys_items_insert_search_vector
+    ON recipys_ingredientsforrecipy;
+DROP TRIGGER recipys_recipy_search_vector ON recipys_recipy;
+DROP FUNCTION recipys_ingredient_search_vector();
+DROP FUNCTION recipys_items_search_vector();
+DROP FUNCTION recipys_refresh_search_vector(integer[]);
+DROP FUNCTION recipys_recipy_search_vector();
+DROP FUNCTION recipys_search_vector(integer, text, text);
+"""
+
+
+def create_triggers(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute(CREATE_TRIGGERS)
+
+
+def drop_triggers(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute(DROP_TRIGGERS)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipys', '0011_recipy_updated_at'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_triggers, drop_triggers),
+    ]
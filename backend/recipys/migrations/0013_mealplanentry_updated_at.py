@@ -0,0 +1,18 @@
+# Generated by Django 3.2.15 on 2026-10-18 20:32
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipys', '0012_search_vector_triggers'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='mealplanentry',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, verbose_name='дата изменения'),
+        ),
+    ]
@@ -1,4 +1,6 @@
 from django.contrib.auth import get_user_model
+from django.contrib.postgres.search import SearchVectorField
+from django.core.validators import MaxValueValidator, MinValueValidator
 from django.db import models
 
 User = get_user_model()
@@ -9,6 +11,10 @@ class Ingredient(models.Model):
     measurement_unit = models.CharField('единицы измерения', max_length=200)
 
     class Meta:
+        constraints = [models.UniqueConstraint(
+            fields=['name', 'measurement_unit'],
+            name='unique_ingredient'
+        )]
         ordering = ['name']
         verbose_name = 'Ингредиент'
         verbose_name_plural = 'Ингредиенты'
@@ -28,11 +34,43 @@ class Tag(models.Model):
         return self.slug
 
 
+class RecipyQuerySet(models.QuerySet):
+    def with_user_flags(self, user):
+        """
+        Добавляет к рецептам признаки is_favorited и is_in_shopping_cart
+        для пользователя, вычисленные подзапросами EXISTS.
+        """
+        if not user.is_authenticated:
+            return self.annotate(
+                is_favorited=models.Value(
+                    False, output_field=models.BooleanField()),
+                is_in_shopping_cart=models.Value(
+                    False, output_field=models.BooleanField())
+            )
+        return self.annotate(
+            is_favorited=models.Exists(Favorite.objects.filter(
+                user=user, recipy=models.OuterRef('pk'))),
+            is_in_shopping_cart=models.Exists(Basket.objects.filter(
+                user=user, recipy=models.OuterRef('pk')))
+        )
+
+
 class Recipy(models.Model):
     name = models.CharField('название блюда', max_length=200)
     text = models.TextField('подробное описание')
     image = models.ImageField('изображение', upload_to='recipes/',)
+    image_thumbnail = models.ImageField(
+        'миниатюра',
+        upload_to='recipes/thumbnails/',
+        blank=True
+    )
+    image_medium = models.ImageField(
+        'изображение среднего размера',
+        upload_to='recipes/medium/',
+        blank=True
+    )
     pub_date = models.DateTimeField('дата добавления', auto_now_add=True)
+    updated_at = models.DateTimeField('дата изменения', auto_now=True)
     author = models.ForeignKey(
         User,
         on_delete=models.SET_NULL,
@@ -47,19 +85,68 @@ class Recipy(models.Model):
     )
     tags = models.ManyToManyField(
         Tag,
+        through='RecipyTag',
         related_name='recipy',
         verbose_name='теги'
     )
     cooking_time = models.PositiveSmallIntegerField(
         'время приготовления',
     )
+    favorites_count = models.PositiveIntegerField(
+        'в избранном', default=0, editable=False
+    )
+    in_baskets_count = models.PositiveIntegerField(
+        'в корзинах', default=0, editable=False
+    )
+    # Заполняется триггерами PostgreSQL, см. миграцию 0012.
+    search_vector = SearchVectorField(null=True, editable=False)
+
+    objects = RecipyQuerySet.as_manager()
 
     class Meta:
-        ordering = ['-pub_date']
+        indexes = [
+            models.Index(
+                fields=['-pub_date', '-id'],
+                name='recipy_pub_date_id_idx'
+            ),
+            models.Index(
+                fields=['-favorites_count', '-id'],
+                name='recipy_favorites_count_idx'
+            ),
+        ]
+        ordering = ['-pub_date', '-id']
         verbose_name = 'рецепт'
         verbose_name_plural = 'рецепты'
 
 
+class RecipyTag(models.Model):
+    """
+    Связь рецепта с тегом. Модель объявлена явно ради индекса по
+    (tag, recipy) для выборок рецептов по тегу, таблица та же, что у
+    связи, созданной Django.
+    """
+    recipy = models.ForeignKey(
+        Recipy,
+        on_delete=models.CASCADE,
+        verbose_name='рецепт'
+    )
+    tag = models.ForeignKey(
+        Tag,
+        on_delete=models.CASCADE,
+        verbose_name='тег'
+    )
+
+    class Meta:
+        db_table = 'recipys_recipy_tags'
+        unique_together = ('recipy', 'tag')
+        indexes = [models.Index(
+            fields=['tag', 'recipy'],
+            name='recipy_tags_tag_recipy_idx'
+        )]
+        verbose_name = 'тег рецепта'
+        verbose_name_plural = 'теги рецептов'
+
+
 class IngredientsForRecipy(models.Model):
     recipy = models.ForeignKey(
         Recipy,
@@ -98,6 +185,9 @@ class Favorite(models.Model):
         related_name='favorite',
         verbose_name='добавленный в избранное рецепт'
     )
+    added_at = models.DateTimeField(
+        'добавлен в избранное', auto_now_add=True, db_index=True
+    )
 
     class Meta:
         constraints = [
@@ -123,6 +213,9 @@ class Basket(models.Model):
         related_name='recipy_in_basket',
         verbose_name='рецепт в корзине'
     )
+    added_at = models.DateTimeField(
+        'добавлен в корзину', auto_now_add=True, db_index=True
+    )
 
     class Meta:
         constraints = [models.UniqueConstraint(
@@ -132,3 +225,60 @@ class Basket(models.Model):
         ordering = ['-id']
         verbose_name = 'рецепт в корзине'
         verbose_name_plural = 'рецепты в корзине'
+
+
+class TrendingRecipy(models.Model):
+    """
+    Рейтинг популярных рецептов. Очки затухают со временем и
+    пересчитываются командой refresh_trending.
+    """
+    recipy = models.OneToOneField(
+        Recipy,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='trending',
+        verbose_name='рецепт'
+    )
+    score = models.FloatField('очки', default=0)
+    updated_at = models.DateTimeField('пересчитан')
+
+    class Meta:
+        indexes = [models.Index(
+            fields=['-score', '-recipy'],
+            name='trending_score_idx'
+        )]
+        ordering = ['-score', '-recipy']
+        verbose_name = 'популярный рецепт'
+        verbose_name_plural = 'популярные рецепты'
+
+
+class MealPlanEntry(models.Model):
+    """Рецепт, запланированный пользователем на дату, с числом порций."""
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='meal_plan',
+        verbose_name='пользователь'
+    )
+    recipy = models.ForeignKey(
+        Recipy,
+        on_delete=models.CASCADE,
+        related_name='meal_plan',
+        verbose_name='рецепт'
+    )
+    date = models.DateField('дата')
+    servings = models.PositiveSmallIntegerField(
+        'порции',
+        default=1,
+        validators=[MinValueValidator(1), MaxValueValidator(100)]
+    )
+    updated_at = models.DateTimeField('дата изменения', auto_now=True)
+
+    class Meta:
+        indexes = [models.Index(
+            fields=['user', 'date'],
+            name='meal_plan_user_date_idx'
+        )]
+        ordering = ['date', 'id']
+        verbose_name = 'блюдо в плане питания'
+        verbose_name_plural = 'план питания'
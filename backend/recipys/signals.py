@@ -0,0 +1,46 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from users.models import Follow, User
+
+from .counters import change_counter
+from .models import Basket, Favorite, Recipy
+
+
+@receiver(post_save, sender=Favorite)
+@receiver(post_delete, sender=Favorite)
+def favorite_changed(instance, created=False, **kwargs):
+    if kwargs['signal'] is post_save and not created:
+        return
+    change_counter(
+        Recipy, instance.recipy_id, 'favorites_count', 1 if created else -1
+    )
+
+
+@receiver(post_save, sender=Basket)
+@receiver(post_delete, sender=Basket)
+def basket_changed(instance, created=False, **kwargs):
+    if kwargs['signal'] is post_save and not created:
+        return
+    change_counter(
+        Recipy, instance.recipy_id, 'in_baskets_count', 1 if created else -1
+    )
+
+
+@receiver(post_save, sender=Recipy)
+@receiver(post_delete, sender=Recipy)
+def recipy_changed(instance, created=False, **kwargs):
+    if kwargs['signal'] is post_save and not created:
+        return
+    change_counter(
+        User, instance.author_id, 'recipes_count', 1 if created else -1
+    )
+
+
+@receiver(post_save, sender=Follow)
+@receiver(post_delete, sender=Follow)
+def follow_changed(instance, created=False, **kwargs):
+    if kwargs['signal'] is post_save and not created:
+        return
+    change_counter(
+        User, instance.author_id, 'followers_count', 1 if created else -1
+    )
@@ -0,0 +1,83 @@
+"""
+Рейтинг популярных рецептов.
+
+Каждое добавление в избранное или корзину приносит рецепту очки, вклад
+уменьшается вдвое за TRENDING_HALF_LIFE_HOURS. При пересчёте накопленные
+очки умножаются на общий множитель затухания, и к ним прибавляются
+только события, появившиеся после прошлого пересчёта.
+"""
+from collections import defaultdict
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F, Max
+from django.utils import timezone
+
+from .models import Basket, Favorite, TrendingRecipy
+
+# Очки за одно добавление.
+WEIGHTS = (
+    (Favorite, 2.0),
+    (Basket, 1.0),
+)
+
+# Рецепты с меньшим числом очков выбывают из рейтинга.
+MIN_SCORE = 0.01
+
+
+def decay(seconds):
+    """Во сколько раз уменьшается вклад события за указанное время."""
+    return 0.5 ** (seconds / 3600 / settings.TRENDING_HALF_LIFE_HOURS)
+
+
+@transaction.atomic
+def refresh_trending(full=False, batch_size=1000):
+    """
+    Обновляет рейтинг и возвращает число рецептов в нём. Если рейтинг
+    пуст или full=True, он строится заново по событиям за
+    TRENDING_WINDOW_DAYS. Удаление из избранного очков не отнимает,
+    их вклад просто затухает.
+    """
+    now = timezone.now()
+    last = None
+    if not full:
+        last = TrendingRecipy.objects.aggregate(
+            last=Max('updated_at')
+        )['last']
+    if last is None:
+        TrendingRecipy.objects.all().delete()
+        since = now - timedelta(days=settings.TRENDING_WINDOW_DAYS)
+    else:
+        since = last
+        TrendingRecipy.objects.update(
+            score=F('score') * decay((now - last).total_seconds()),
+            updated_at=now
+        )
+        TrendingRecipy.objects.filter(score__lt=MIN_SCORE).delete()
+
+    scores = defaultdict(float)
+    for model, weight in WEIGHTS:
+        events = (
+            model.objects
+            .filter(added_at__gt=since, added_at__lte=now)
+            .values_list('recipy_id', 'added_at')
+            .iterator()
+        )
+        for recipy_id, added_at in events:
+            scores[recipy_id] += weight * decay(
+                (now - added_at).total_seconds()
+            )
+
+    existing = TrendingRecipy.objects.in_bulk(list(scores))
+    for recipy_id, row in existing.items():
+        row.score += scores.pop(recipy_id)
+    TrendingRecipy.objects.bulk_update(
+        existing.values(), ['score'], batch_size=batch_size
+    )
+    TrendingRecipy.objects.bulk_create(
+        (TrendingRecipy(recipy_id=recipy_id, score=score, updated_at=now)
+         for recipy_id, score in scores.items()),
+        batch_size=batch_size
+    )
+    return TrendingRecipy.objects.count()
@@ -14,7 +14,8 @@ class UserAdmin(admin.ModelAdmin):
     list_filter = ('email', 'username')
     search_fields = ('email', 'username')
     list_display = ('id', 'email', 'username',
-                    'first_name', 'last_name', 'is_superuser')
+                    'first_name', 'last_name', 'is_superuser',
+                    'recipes_count', 'followers_count')
     list_editable = ('is_superuser',)
 
 
@@ -0,0 +1,54 @@
+# Generated by Django 3.2.15 on 2026-10-18 19:20
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def actual_count(related_model, field_name):
+    """
+    Подзапрос с числом связанных записей. Запрос повторяет
+    recipys.counters, но не импортирует код приложения: миграция должна
+    работать и после того, как модуль изменится.
+    """
+    return Coalesce(Subquery(
+        related_model.objects
+        .filter(**{field_name: OuterRef('pk')})
+        .order_by()
+        .values(field_name)
+        .annotate(total=Count('pk'))
+        .values('total')
+    ), 0)
+
+
+def fill_counters(apps, schema_editor):
+    apps.get_model('users', 'User').objects.update(
+        recipes_count=actual_count(
+            apps.get_model('recipys', 'Recipy'), 'author'
+        ),
+        followers_count=actual_count(
+            apps.get_model('users', 'Follow'), 'author'
+        ),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0001_initial'),
+        ('recipys', '0007_counters'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='user',
+            name='followers_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='подписчиков'),
+        ),
+        migrations.AddField(
+            model_name='user',
+            name='recipes_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='рецептов'),
+        ),
+        migrations.RunPython(fill_counters, migrations.RunPython.noop),
+    ]
@@ -10,6 +10,12 @@ class User(AbstractUser):
     first_name = models.CharField('имя', max_length=150)
     last_name = models.CharField('фамилия', max_length=150)
     is_superuser = models.BooleanField('является администатором')
+    recipes_count = models.PositiveIntegerField(
+        'рецептов', default=0, editable=False
+    )
+    followers_count = models.PositiveIntegerField(
+        'подписчиков', default=0, editable=False
+    )
 
     USERNAME_FIELD = 'email'
     REQUIRED_FIELDS = ['first_name', 'last_name', 'username']